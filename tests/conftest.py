@@ -11,3 +11,21 @@ def django_db_setup():
 def db_access_without_rollback_and_truncate(request, django_db_setup, django_db_blocker):
     django_db_blocker.unblock()
     request.addfinalizer(django_db_blocker.restore)
+
+
+@pytest.fixture(autouse=True)
+def clear_restriction_index():
+    """Rolled back restrictions don't send signals, so every test starts with an empty index"""
+    from wagtail_graphql.permissions import restriction_index
+    restriction_index.clear()
+    yield
+    restriction_index.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_field_cache():
+    """Cached fields outlive the rolled back changes of a test"""
+    from wagtail_graphql.field_cache import field_cache
+    field_cache.cache_clear()
+    yield
+    field_cache.cache_clear()
@@ -0,0 +1,127 @@
+"""Synthetic content for the benchmarks: a large page tree, images, documents, snippets and restrictions."""
+import json
+from typing import Any, List
+
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+
+class SyntheticSite:
+    """Content added below the home page, ``scale`` times the default size.
+
+    The ``/benchmark`` section has ``10 * scale`` branches of 10 leaves each, every third leaf a
+    ``PageTypeA`` with StreamFields linking images, pages and snippets.  Pages are inserted in bulk,
+    without the treebeard and Wagtail page hooks.
+    """
+    branches_per_scale = 10
+    leaves = 10
+
+    def __init__(self, scale: int = 1) -> None:
+        self.scale = scale
+        self.images: List[int] = []
+        self.snippets: List[int] = []
+        self.section: Any = None
+
+    def create(self) -> 'SyntheticSite':
+        self.create_images()
+        self.create_documents()
+        self.create_snippets()
+        self.create_pages()
+        self.create_restrictions()
+        return self
+
+    def create_images(self) -> None:
+        from wagtail.images.models import Image
+        Image.objects.bulk_create([
+            Image(title='Synthetic %d' % i, file='original_images/synthetic_%d.png' % i, width=640, height=480,
+                  collection_id=1 + i % 2)
+            for i in range(50 * self.scale)
+        ])
+        self.images = list(Image.objects.filter(title__startswith='Synthetic ').values_list('id', flat=True))
+
+    def create_documents(self) -> None:
+        from wagtail.documents.models import Document
+        Document.objects.bulk_create([
+            Document(title='Synthetic %d' % i, file='documents/synthetic_%d.pdf' % i, collection_id=1 + i % 2)
+            for i in range(50 * self.scale)
+        ])
+
+    def create_snippets(self) -> None:
+        from test_app_1.models import Advert
+        from test_app_2.models import App2Snippet
+        Advert.objects.bulk_create([Advert(text='Advert %d' % i) for i in range(50 * self.scale)])
+        App2Snippet.objects.bulk_create([App2Snippet(text='Snippet %d' % i) for i in range(50 * self.scale)])
+        self.snippets = list(App2Snippet.objects.values_list('id', flat=True))
+
+    def create_pages(self) -> None:
+        from wagtail.core.models import Page
+        from test_app_1.models import HomePage
+        home = Page.objects.get(id=3)
+        self.section = home.add_child(instance=HomePage(title='Benchmark', slug='benchmark'))
+
+        now = timezone.now()
+        pages = []
+        branches = self.branches_per_scale * self.scale
+        section_url = self.section.url_path
+        for b in range(1, branches + 1):
+            branch_path = Page._get_path(self.section.path, self.section.depth + 1, b)
+            branch = self.page(branch_path, 'branch-%d' % b, section_url, self.leaves, now)
+            pages.append(branch)
+            for leaf in range(1, self.leaves + 1):
+                path = Page._get_path(branch_path, self.section.depth + 2, leaf)
+                pages.append(self.page(path, 'leaf-%d-%d' % (b, leaf), branch.url_path, 0, now, leaf % 3 == 0))
+        Page.objects.bulk_create(pages)
+        Page.objects.filter(id=self.section.id).update(numchild=branches)
+
+        ids = dict(Page.objects.filter(path__startswith=self.section.path).values_list('path', 'id'))
+        page_ids = list(ids.values())
+        for page in pages:
+            specific = self.specific(page, ids[page.path], page_ids)
+            specific.save_base(raw=True, force_insert=True)
+
+    def page(self, path: str, slug: str, parent_url: str, numchild: int, now, type_a: bool = False):
+        from wagtail.core.models import Page
+        from test_app_1.models import HomePage
+        from test_app_2.models import PageTypeA
+        return Page(
+            title=slug.replace('-', ' ').title(), draft_title=slug, slug=slug, path=path,
+            depth=len(path) // Page.steplen, numchild=numchild, live=True, url_path=parent_url + slug + '/',
+            first_published_at=now, last_published_at=now, show_in_menus=numchild > 0,
+            content_type=ContentType.objects.get_for_model(PageTypeA if type_a else HomePage),
+        )
+
+    def specific(self, page, page_id: int, page_ids: list):
+        from test_app_1.models import HomePage
+        from test_app_2.models import PageTypeA
+        if page.content_type.model_class() is HomePage:
+            return HomePage(page_ptr_id=page_id, field_char=page.slug[:10])
+
+        def pick(values, i):
+            return values[(page_id * 7 + i) % len(values)]
+        links = [{'type': ('image', 'page', 'snippet')[i % 3],
+                  'value': pick((self.images, page_ids, self.snippets)[i % 3], i)} for i in range(12)]
+        links_list = [{'type': name, 'value': [pick(values, i) for i in range(5)]}
+                      for name, values in (('image', self.images), ('page', page_ids), ('snippet', self.snippets))]
+        custom = [{'type': 'custom2', 'value': {
+            'field_link': pick(page_ids, i), 'field_link_list': [pick(page_ids, i + j) for j in range(5)],
+            'field_image': pick(self.images, i), 'field_image_list': [pick(self.images, i + j) for j in range(5)],
+            'field_snippet': pick(self.snippets, i),
+            'field_snippet_list': [pick(self.snippets, i + j) for j in range(5)],
+        }} for i in range(4)]
+        return PageTypeA(
+            page_ptr_id=page_id,
+            streamfield=json.dumps([{'type': 'h1', 'value': 'Heading %d' % i} for i in range(10)]),
+            third=json.dumps([]), links=json.dumps(links), lists=json.dumps([]),
+            links_list=json.dumps(links_list), custom=json.dumps(custom),
+        )
+
+    def create_restrictions(self) -> None:
+        from wagtail.core.models import Page, PageViewRestriction
+        branches = Page.objects.filter(path__startswith=self.section.path, depth=self.section.depth + 1)
+        groups = list(Group.objects.all())
+        for i, page in enumerate(branches.order_by('path')[::5]):
+            restriction_type = (PageViewRestriction.LOGIN, PageViewRestriction.GROUPS)[i % 2]
+            restriction = PageViewRestriction.objects.create(page=page, restriction_type=restriction_type)
+            if restriction_type == PageViewRestriction.GROUPS:
+                restriction.groups.set(groups[:1 + i % len(groups)])
@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.fixture
+def document_cache():
+    from wagtail_graphql.backend import document_cache
+    document_cache.cache_clear()
+    yield document_cache
+    document_cache.cache_clear()
+
+
+def test_document_cache_lru():
+    from wagtail_graphql.backend import DocumentCacheBackend
+    from wagtail_graphql.schema import schema
+    backend = DocumentCacheBackend(maxsize=2)
+
+    first = backend.document_from_string(schema, '{ format }')
+    assert backend.document_from_string(schema, '{ format }') is first
+    backend.document_from_string(schema, '{ __typename }')
+    backend.document_from_string(schema, '{ format }')
+    backend.document_from_string(schema, '{ site { siteName } }')
+    # '{ __typename }' was the least recently used
+    assert backend.cache_info() == (2, 3, 2, 2)
+    assert backend.document_from_string(schema, '{ format }') is first
+    assert backend.cache_info().misses == 3
+
+
+def test_document_cache_validation_errors():
+    from wagtail_graphql.backend import DocumentCacheBackend
+    from wagtail_graphql.schema import schema
+    backend = DocumentCacheBackend(maxsize=2)
+
+    document = backend.document_from_string(schema, '{ notAField }')
+    assert backend.document_from_string(schema, '{ notAField }') is document
+    result = document.execute()
+    assert result.invalid
+    assert result.errors[0].message == 'Cannot query field "notAField" on type "Query".'
+
+
+@pytest.mark.django_db
+def test_view_document_cache(client, document_cache):
+    for _ in range(3):
+        response = client.post('/graphql', {"query": "{ format }"})
+        assert response.json() == {'data': {'format': '0.2.0'}}
+    assert document_cache.cache_info()[:2] == (2, 1)
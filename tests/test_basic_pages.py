@@ -97,3 +97,17 @@ def test_show_in_menus(client):
 @pytest.mark.django_db
 def test_prefetch(client):
     assert_query(client, 'prefetch')
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_children_are_batched(client, django_assert_max_num_queries):
+    query = '{ pages { id children { id children { id } } } }'
+    client.post('/graphql', {"query": query})
+    # site + pages (ids + 3 types) + children (ids + 3 types) + grandchildren (ids)
+    with django_assert_max_num_queries(10):
+        response = client.post('/graphql', {"query": query})
+    assert response.json()['data']['pages'][0] == {
+        'id': 3,
+        'children': [{'id': 4, 'children': []}, {'id': 5, 'children': []}, {'id': 6, 'children': []}]
+    }
@@ -0,0 +1,222 @@
+"""Query count benchmarks of the fixture queries over a synthetic site.
+
+Each query runs once to warm up, then its database queries and wall time are measured, and its
+peak memory in a third run.  Query counts above the baselines in ``benchmarks.json`` fail; they
+don't depend on the size of the site once N+1 queries are gone.  ``test_streamfield_conversion``
+measures how many StreamField blocks per second are converted, without the database.
+
+Environment variables: ``BENCHMARK_SCALE`` multiplies the size of the site (1 by default, 20 for
+thousands of pages), ``BENCHMARK_UPDATE=1`` stores the counts as the new baselines,
+``BENCHMARK_REPORT`` is a file to write the measurements to as JSON and
+``BENCHMARK_MIN_BLOCKS_PER_SECOND`` fails the conversion benchmark below that rate.
+"""
+import json
+import os
+import time
+import tracemalloc
+from typing import Dict
+
+import pytest
+from django.conf import settings
+from django.db import transaction
+from wagtail_graphql.timing import RequestTimings
+from .graphql import get_query
+from .synthetic import SyntheticSite
+IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
+
+SCALE = int(os.environ.get('BENCHMARK_SCALE', '1'))
+UPDATE = bool(os.environ.get('BENCHMARK_UPDATE'))
+REPORT = os.environ.get('BENCHMARK_REPORT')
+BASELINES = os.path.join(os.path.dirname(__file__), 'benchmarks.json')
+MIN_BLOCKS_PER_SECOND = int(os.environ.get('BENCHMARK_MIN_BLOCKS_PER_SECOND', '0'))
+MODE = 'relay' if IS_RELAY else 'default'
+
+FIXTURES = sorted(
+    name[:-len('.graphql')] for name in os.listdir(os.path.join(os.path.dirname(__file__), 'graphql'))
+    if name.endswith('.graphql') and not name.endswith('_fail.graphql')
+)
+
+STREAMFIELD_FRAGMENT = '''
+fragment Links on Test_app_2PageTypeA {
+  links {
+    ... on ImageBlock { value { title } }
+    ... on PageBlock { value { title } }
+    ... on Test_app_2App2SnippetBlock { value { text } }
+  }
+  linksList {
+    ... on ImageListBlock { value { title } }
+    ... on PageListBlock { value { title } }
+    ... on Test_app_2App2SnippetListBlock { value { text } }
+  }
+  custom {
+    ... on Test_app_2CustomBlock2 {
+      fieldLink { title }
+      fieldLinkList { title }
+      fieldImage { title }
+      fieldImageList { title }
+      fieldSnippet { text }
+      fieldSnippetList { text }
+    }
+  }
+}
+'''
+
+if IS_RELAY:
+    QUERIES = {
+        'benchmark_tree': '''{ page(url: "/benchmark") { children { edges { node {
+            title children { edges { node { title urlPath } } } } } } } }''',
+        'benchmark_streamfields': STREAMFIELD_FRAGMENT + '''{ pages(contentType: "test_app_2.PageTypeA") {
+            edges { node { title ...Links } } } }''',
+        'benchmark_children_first': '''{ page(url: "/benchmark") { children(first: 2) { edges { node {
+            title children(first: 2) { totalCount edges { node { title } } } } } } } }''',
+    }
+else:
+    QUERIES = {
+        'benchmark_tree': '{ page(url: "/benchmark") { children { title children { title urlPath } } } }',
+        'benchmark_streamfields': STREAMFIELD_FRAGMENT + '''{ pages(contentType: "test_app_2.PageTypeA") {
+            title ...Links } }''',
+    }
+QUERIES.update({
+    'benchmark_images': '{ images { id url urlLink(rendition: "width-100") tags } }',
+    'benchmark_documents': '{ documents { id title url } }',
+    'benchmark_menus': '{ showInMenus { title urlPath } }',
+})
+
+CONVERSION_QUERY = '''{ page {
+  custom { ... on Test_app_2CustomBlock1 {
+    field fieldChar fieldText fieldInt fieldFloat fieldBool fieldDate fieldTime fieldDatetime
+    fieldRich fieldChoice fieldList
+  } }
+  third {
+    ... on StringBlock { string: value field }
+    ... on IntBlock { int: value field }
+    ... on DateBlock { date: value field }
+    ... on TimeBlock { time: value field }
+  }
+} }'''
+
+RESULTS: Dict[str, dict] = {}
+
+
+@pytest.fixture(scope='module', autouse=True)
+def report():
+    yield
+    if REPORT:
+        with open(REPORT, 'w') as f:
+            json.dump({'mode': MODE, 'scale': SCALE, 'queries': RESULTS}, f, indent=2, sort_keys=True)
+
+
+@pytest.fixture(scope='module')
+def synthetic_site(django_db_blocker):
+    with django_db_blocker.unblock():
+        atomic = transaction.atomic()
+        atomic.__enter__()
+        try:
+            yield SyntheticSite(SCALE).create()
+        finally:
+            transaction.set_rollback(True)
+            atomic.__exit__(None, None, None)
+
+
+def _baselines():
+    with open(BASELINES) as f:
+        return json.load(f)
+
+
+def _update_baseline(name, count):
+    baselines = _baselines()
+    baselines.setdefault(MODE, {})[name] = count
+    with open(BASELINES, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def _post(client, query):
+    response = client.post('/graphql', {"query": query})
+    return response.json()
+
+
+def _clear_caches():
+    """Forget the cached fields and restrictions of the warm-up, so per-object resolvers are measured."""
+    from wagtail_graphql.field_cache import field_cache
+    from wagtail_graphql.permissions import restriction_index
+    field_cache.cache_clear()
+    restriction_index.clear()
+
+
+@pytest.mark.parametrize('name', FIXTURES + sorted(QUERIES))
+@pytest.mark.django_db
+def test_query_count(name, client, synthetic_site, monkeypatch):
+    monkeypatch.setattr('wagtail_graphql.loaders.MISSING_RENDITIONS', 'skip')
+    query = QUERIES[name] if name in QUERIES else get_query(name)[0]
+
+    if 'errors' in _post(client, query):
+        pytest.skip("%s doesn't run with the %s settings" % (name, MODE))
+
+    _clear_caches()
+    timings = RequestTimings()
+    with timings.measure():
+        _post(client, query)
+
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        _post(client, query)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    count = timings.queries
+    RESULTS[name] = {'queries': count, 'time': round(timings.time * 1000, 3), 'peak_memory': peak}
+    if UPDATE:
+        _update_baseline(name, count)
+        return
+
+    baseline = _baselines().get(MODE, {}).get(name)
+    assert baseline is not None, 'No baseline for %s, run with BENCHMARK_UPDATE=1' % name
+    assert count <= baseline, '%s ran %d queries, %d in the baseline' % (name, count, baseline)
+
+
+def _conversion_page(blocks):
+    from test_app_2.models import PageTypeA
+    custom = [{'type': 'custom1', 'value': {
+        'field_char': 'char %d' % i, 'field_text': 'text', 'field_int': i, 'field_float': i / 2,
+        'field_bool': True, 'field_date': '2019-01-01', 'field_time': '10:30:00',
+        'field_datetime': '2019-01-01T10:30:00', 'field_rich': '<p>rich</p>', 'field_choice': 'tea',
+        'field_list': ['a', 'b', 'c'], 'field_list_2': [{'field_text': 'inner'}] * 3,
+    }} for i in range(blocks // 2)]
+    third = [{'type': ('char', 'int', 'date', 'time')[i % 4],
+              'value': ('char', i, '2019-01-01', '10:30:00')[i % 4]} for i in range(blocks // 2)]
+    return PageTypeA(title='Conversion', custom=json.dumps(custom), third=json.dumps(third))
+
+
+@pytest.mark.django_db
+def test_streamfield_conversion(rf):
+    import graphene
+    from wagtail_graphql.registry import registry
+    from wagtail_graphql.schema import get_schema
+    from test_app_2.models import PageTypeA
+    get_schema()
+    blocks = 1000 * SCALE
+
+    class ConversionQuery(graphene.ObjectType):
+        page = graphene.Field(registry.pages[PageTypeA])
+
+        def resolve_page(self, _info):
+            return _conversion_page(blocks)
+
+    schema = graphene.Schema(query=ConversionQuery)
+    request = rf.get('/graphql')
+    result = schema.execute(CONVERSION_QUERY, context_value=request)
+    assert not result.errors
+    assert len(result.data['page']['custom']) + len(result.data['page']['third']) == blocks
+
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        schema.execute(CONVERSION_QUERY, context_value=rf.get('/graphql'))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    RESULTS['streamfield_conversion'] = {'blocks': blocks, 'blocks_per_second': round(blocks / best)}
+    if MIN_BLOCKS_PER_SECOND:
+        assert blocks / best >= MIN_BLOCKS_PER_SECOND, '%d blocks per second' % (blocks / best)
@@ -0,0 +1,91 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
+
+PAGES_QUERY = '''
+query($first: Int, $last: Int, $after: String, $before: String) {
+  pages(first: $first, last: $last, after: $after, before: $before) {
+    edges { node { title } }
+    pageInfo { startCursor endCursor hasPreviousPage hasNextPage }
+  }
+}
+'''
+
+
+def _pages(client, **variables):
+    import json
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', {"query": PAGES_QUERY, "variables": json.dumps(variables)})
+    assert 'errors' not in response.json()
+    pages = response.json()['data']['pages']
+    titles = [edge['node']['title'] for edge in pages['edges']]
+    counts = [q for q in ctx.captured_queries if 'COUNT(' in q['sql']]
+    return titles, pages['pageInfo'], counts
+
+
+@pytest.mark.skipif(not IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_keyset_pagination(client):
+    titles, info, counts = _pages(client, first=2)
+    assert titles == ['Home', 'TEST']
+    assert info['hasNextPage'] and not info['hasPreviousPage']
+    assert not counts
+
+    titles, info, _ = _pages(client, first=2, after=info['endCursor'])
+    assert titles == ['Blank Page', 'Form']
+    assert not info['hasNextPage']
+
+    titles, info, _ = _pages(client, last=1, before=info['endCursor'])
+    assert titles == ['Blank Page']
+    assert info['hasPreviousPage'] and not info['hasNextPage']
+
+    titles, _, _ = _pages(client)
+    assert titles == ['Home', 'TEST', 'Blank Page', 'Form']
+
+
+@pytest.mark.skipif(not IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_keyset_cursors_encode_paths(client):
+    from wagtail_graphql.types.connections import cursor_to_path
+    _, info, _ = _pages(client, first=1)
+    assert cursor_to_path(info['startCursor']) == '00010001'
+
+    response = client.post('/graphql', {"query": '{ pages(after: "bm90IGEgcGF0aA==") { edges { cursor } } }'})
+    assert response.json()['errors'][0]['message'] == "Invalid cursor 'bm90IGEgcGF0aA=='"
+
+
+@pytest.mark.skipif(not IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_total_count_and_children(client):
+    query = '''{ pages(first: 1) { totalCount edges { node {
+        children(first: 2) { totalCount edges { node { title } } }
+    } } } }'''
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', {"query": query})
+    pages = response.json()['data']['pages']
+    assert pages['totalCount'] == 4
+    assert pages['edges'][0]['node']['children'] == {
+        'totalCount': 3,
+        'edges': [{'node': {'title': 'TEST'}}, {'node': {'title': 'Blank Page'}}],
+    }
+    assert len([q for q in ctx.captured_queries if 'COUNT(' in q['sql']]) == 1
+
+
+@pytest.mark.skipif(not IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_children_are_limited_before_loading(client):
+    from wagtail_graphql.types.connections import path_to_cursor
+    query = '''{ page(id: 3) { children(first: 1, after: "%s") {
+        totalCount edges { node { title } } pageInfo { hasNextPage }
+    } } }''' % path_to_cursor('000100010001')
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', {"query": query})
+    assert response.json()['data']['page']['children'] == {
+        'totalCount': 3,
+        'edges': [{'node': {'title': 'Blank Page'}}],
+        'pageInfo': {'hasNextPage': True},
+    }
+    # only the returned child and the one after it are loaded as specific pages
+    assert not [q for q in ctx.captured_queries if 'test_app_2_pagetypea' in q['sql']]
@@ -0,0 +1,71 @@
+import pytest
+from django.conf import settings
+from graphql import parse
+IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
+
+
+def _analyze(query, **variables):
+    from graphene_django.settings import graphene_settings
+    from wagtail_graphql.cost import QueryCost
+    return QueryCost().analyze(graphene_settings.SCHEMA, parse(query), variables=variables)
+
+
+def test_list_sizes():
+    assert _analyze('{ images { id } }') == (100, 2)
+    assert _analyze('{ images(limit: 5) { id focalPoint { x } } }') == (10, 3)
+    assert _analyze('query($n: Int) { images(limit: $n) { id } }', n=3) == (3, 2)
+    assert _analyze('{ __schema { types { name } } }') == (0, 1)
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+def test_fragments_count_the_most_expensive_type():
+    query = '''
+    fragment Form on Test_app_1FormPage { owner { id } formFields { name } }
+    {
+      pages {
+        ... on Test_app_1HomePage { owner { username } }
+        ...Form
+      }
+    }
+    '''
+    assert _analyze(query) == (100 * (1 + 1 + 10), 3)
+
+
+@pytest.mark.skipif(not IS_RELAY, reason="requires the relay setting")
+def test_connections_count_their_size_once():
+    assert _analyze('{ pages(first: 5) { edges { node { title } } } }') == (5 * (1 + 2), 4)
+
+
+@pytest.mark.django_db
+def test_query_cost_budget(client, monkeypatch):
+    from wagtail_graphql.cost import QueryCost
+    monkeypatch.setattr('wagtail_graphql.views.GraphQLView.query_cost', QueryCost(max_cost=50, max_depth=3))
+
+    response = client.post('/graphql', {"query": '{ images(limit: 2) { id } }'})
+    assert response.json() == {
+        'data': {'images': [{'id': '1'}, {'id': '2'}]},
+        'extensions': {'cost': {'requested': 2, 'depth': 2, 'budget': 50, 'maxDepth': 3}},
+    }
+
+    response = client.post('/graphql', {"query": '{ images { id } }'})
+    assert response.status_code == 400
+    assert response.json()['errors'][0]['message'] == 'Query cost 100 exceeds the budget of 50'
+    assert response.json()['extensions']['cost']['requested'] == 100
+
+    response = client.post('/graphql', {"query": '{ images(limit: 1) { uploadedByUser { imageSet { id } } } }'})
+    assert response.json()['errors'][0]['message'] == 'Query depth 4 exceeds the limit of 3'
+
+
+@pytest.mark.django_db
+def test_query_cost_of_cyclic_fragments(client, monkeypatch):
+    from wagtail_graphql.cost import QueryCost
+    monkeypatch.setattr('wagtail_graphql.views.GraphQLView.query_cost', QueryCost(max_cost=10000))
+    if IS_RELAY:
+        query = '{ pages { edges { node { ...F } } } } fragment F on Page { children { edges { node { ...F } } } }'
+    else:
+        query = '{ pages { ...F } } fragment F on Page { children { ...F } }'
+    assert _analyze(query)[1] == (6 if IS_RELAY else 2)
+
+    response = client.post('/graphql', {"query": query})
+    assert response.status_code == 400
+    assert response.json()['errors'][0]['message'] == 'Cannot spread fragment "F" within itself.'
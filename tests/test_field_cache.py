@@ -0,0 +1,105 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+IMAGE_QUERY = '{ image(id: 1) { urlLink } }'
+
+
+@pytest.mark.django_db
+def test_cached_rendition_url(client):
+    from wagtail.images.models import Image
+    from wagtail_graphql.field_cache import field_cache
+    client.post('/graphql', {"query": IMAGE_QUERY})
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', {"query": IMAGE_QUERY})
+    assert response.json()['data']['image']['urlLink'].startswith('/media/images/')
+    assert not [q for q in ctx.captured_queries if 'wagtailimages_rendition' in q['sql']]
+    assert field_cache.cache_info()[:2] == (1, 1)
+
+    Image.objects.get(id=1).save()
+    client.post('/graphql', {"query": IMAGE_QUERY})
+    assert field_cache.cache_info()[:2] == (1, 2)
+
+
+@pytest.mark.django_db
+def test_cached_url_path_of_moved_pages(client):
+    from wagtail.core.models import Page
+    parent = Page.objects.get(id=5)
+    child = parent.add_child(instance=Page(title='Child', slug='child', live=True))
+    query = '{ page(id: %d) { urlPath } }' % child.id
+    assert client.post('/graphql', {"query": query}).json() == {'data': {'page': {'urlPath': '/blank-page/child'}}}
+
+    parent.move(Page.objects.get(id=4), pos='last-child')
+    assert client.post('/graphql', {"query": query}).json() == {
+        'data': {'page': {'urlPath': '/test/blank-page/child'}}
+    }
+
+
+@pytest.mark.django_db
+def test_shared_field_cache():
+    from django.core.cache import cache
+    from wagtail.images.models import Image
+    from wagtail_graphql.field_cache import FieldCache
+    cache.clear()
+    field_cache = FieldCache(cache_alias='default')
+    image = Image.objects.get(id=1)
+    calls = []
+
+    def resolve():
+        calls.append(1)
+        return 'value'
+
+    assert field_cache.get_or_resolve('url', image, (), resolve) == 'value'
+    assert field_cache.get_or_resolve('url', image, (), resolve) == 'value'
+    assert field_cache.get_or_resolve('url', image, ('other',), resolve) == 'value'
+    assert len(calls) == 2
+    # another process sees the invalidation
+    FieldCache(cache_alias='default').invalidate(Image, image.pk)
+    field_cache.get_or_resolve('url', image, (), resolve)
+    assert len(calls) == 3
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_local_field_cache_expiry(monkeypatch):
+    from wagtail.images.models import Image
+    from wagtail_graphql import field_cache as module
+    field_cache = module.FieldCache(maxsize=2, timeout=5)
+    images = [Image(pk=pk) for pk in (1, 2, 3)]
+    now = [100.0]
+    monkeypatch.setattr(module, 'monotonic', lambda: now[0])
+
+    for image in images:
+        field_cache.get_or_resolve('url', image, (), lambda: 'value')
+    # the oldest value and its object were evicted
+    assert field_cache.cache_info()[2:] == (2, 2)
+    assert len(field_cache._objects) == 2
+    field_cache.get_or_resolve('url', images[2], (), lambda: 'value')
+    assert field_cache.cache_info()[:2] == (1, 3)
+
+    now[0] += 5
+    field_cache.get_or_resolve('url', images[2], (), lambda: 'value')
+    assert field_cache.cache_info()[:2] == (1, 4)
+
+    field_cache.invalidate(Image, 3)
+    assert 3 not in {pk for _label, pk in field_cache._objects}
+    field_cache.get_or_resolve('url', images[2], (), lambda: 'value')
+    assert field_cache.cache_info()[:2] == (1, 5)
+
+
+@pytest.mark.django_db
+def test_previews_are_not_cached():
+    from wagtail.core.models import Page
+    from wagtail_graphql.field_cache import cached_field, field_cache
+
+    @cached_field
+    def resolve_title(self, _info):
+        return self.title
+
+    page = Page.objects.get(id=5)
+    assert resolve_title(page, None) == 'Blank Page'
+    preview = Page.objects.get(id=5)
+    preview.title, preview.is_preview = 'Edited', True
+    assert resolve_title(preview, None) == 'Edited'
+    assert resolve_title(page, None) == 'Blank Page'
+    assert field_cache.cache_info()[:2] == (1, 1)
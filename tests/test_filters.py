@@ -0,0 +1,83 @@
+import pytest
+from django.conf import settings
+IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
+
+
+def _data(client, query):
+    response = client.post('/graphql', {"query": query})
+    assert 'errors' not in response.json(), response.json()
+    return response.json()['data']
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_pages_pagination(client):
+    def titles(args):
+        return [p['title'] for p in _data(client, '{ pages(%s) { title } }' % args)['pages']]
+
+    assert titles('limit: 2') == ['Home', 'TEST']
+    assert titles('limit: 2, offset: 1') == ['TEST', 'Blank Page']
+    assert titles('after: 4') == ['Blank Page', 'Form']
+    assert titles('after: 4, limit: 1') == ['Blank Page']
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_pages_filters(client):
+    def ids(args):
+        return [p['id'] for p in _data(client, '{ pages(%s) { id } }' % args)['pages']]
+
+    assert ids('contentType: "test_app_1.HomePage"') == [3, 5]
+    assert ids('minDepth: 3, maxDepth: 3') == [4, 5, 6]
+    assert ids('maxDepth: 2') == [3]
+    assert ids('publishedAfter: "2019-03-01T00:00:00+00:00"') == [5, 6]
+    assert ids('publishedBefore: "2019-03-01T00:00:00+00:00", minDepth: 3') == [4]
+
+    response = client.post('/graphql', {"query": '{ pages(contentType: "test_app_1.Missing") { id } }'})
+    assert response.json()['errors'][0]['message'] == "Content type 'test_app_1.Missing' doesn't exist"
+
+
+@pytest.mark.django_db
+def test_images_and_documents_filters(client):
+    def ids(field, args):
+        return [int(o['id']) for o in _data(client, '{ %s(%s) { id } }' % (field, args))[field]]
+
+    assert ids('images', 'limit: 1') == [1]
+    assert ids('images', 'after: 1') == [2]
+    assert ids('images', 'tag: "tag3"') == [2]
+    assert ids('images', 'collection: 1') == [1]
+    assert ids('documents', 'tag: "code"') == [1, 2]
+    assert ids('documents', 'tag: "code", offset: 1') == [2]
+    assert ids('documents', 'createdAfter: "2019-01-06T00:20:00+00:00"') == [2]
+    assert ids('documents', 'createdBefore: "2019-01-06T00:20:00+00:00"') == [1]
+
+
+@pytest.mark.django_db
+def test_max_page_size(client, monkeypatch):
+    monkeypatch.setattr('wagtail_graphql.filters.MAX_PAGE_SIZE', {'images': 1, 'default': 3})
+    assert len(_data(client, '{ images { id } }')['images']) == 1
+    assert len(_data(client, '{ images(limit: 5) { id } }')['images']) == 1
+    assert len(_data(client, '{ documents(limit: 5) { id } }')['documents']) == 2
+    if IS_RELAY:
+        pages = _data(client, '{ pages { edges { node { title } } pageInfo { hasNextPage } } }')['pages']
+        assert len(pages['edges']) == 3 and pages['pageInfo']['hasNextPage']
+    else:
+        assert len(_data(client, '{ pages { title } }')['pages']) == 3
+
+    response = client.post('/graphql', {"query": '{ images(limit: -1) { id } }'})
+    assert response.json()['errors'][0]['message'] == "Argument 'limit' must be a non-negative integer"
+
+
+@pytest.mark.django_db
+def test_paginate_keeps_the_ordering():
+    from wagtail.images.models import Image
+    from wagtail_graphql.filters import paginate
+
+    def ids(queryset, **kwargs):
+        return list(paginate(queryset, 'images', **kwargs).values_list('id', flat=True))
+
+    assert ids(Image.objects.order_by('-pk')) == [2, 1]
+    assert ids(Image.objects.order_by('-pk'), limit=1) == [2]
+    assert ids(Image.objects.order_by('title'), offset=0) == list(
+        Image.objects.order_by('title', 'pk').values_list('id', flat=True))
+    assert ids(Image.objects.order_by('-pk'), after=1) == [2]
@@ -20,3 +20,129 @@ def test_image_with_rendition(client):
 @pytest.mark.django_db
 def test_images_list(client):
     assert_query(client, 'images', 'all')
+
+
+RENDITIONS_QUERY = '{ images { urlLink(rendition: "%s") } }'
+
+
+def _rendition_queries(client, spec):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', {"query": RENDITIONS_QUERY % spec})
+    assert 'errors' not in response.json()
+    selects = [q for q in ctx.captured_queries
+               if q['sql'].startswith('SELECT') and 'wagtailimages_rendition' in q['sql']]
+    return response.json()['data']['images'], selects
+
+
+@pytest.mark.django_db
+def test_renditions_are_batched(client):
+    from wagtail_graphql.field_cache import field_cache
+    images, selects = _rendition_queries(client, 'max-800x600')
+    assert images == [{'urlLink': '/media/images/download.max-800x600.png'},
+                      {'urlLink': '/media/images/download_hxHClaK.max-800x600.png'}]
+    assert len(selects) == 1
+
+    field_cache.cache_clear()
+    _, selects = _rendition_queries(client, 'fill-300x150|jpegquality-60')
+    assert len(selects) == 1
+
+
+@pytest.mark.django_db
+def test_missing_renditions_skipped(client, monkeypatch):
+    from wagtail.images.models import Rendition
+    monkeypatch.setattr('wagtail_graphql.loaders.MISSING_RENDITIONS', 'skip')
+    images, _ = _rendition_queries(client, 'width-101')
+    assert images == [{'urlLink': None}, {'urlLink': None}]
+    assert not Rendition.objects.filter(filter_spec='width-101').exists()
+
+
+@pytest.mark.django_db
+def test_missing_renditions_deferred(client, monkeypatch):
+    from wagtail.images.models import Rendition
+    monkeypatch.setattr('wagtail_graphql.loaders.MISSING_RENDITIONS', 'defer')
+    for _ in range(2):
+        images, _ = _rendition_queries(client, 'width-102')
+        assert images[0]['urlLink'].startswith('/images/')
+        assert images[0]['urlLink'].endswith('/1/width-102/')
+    assert not Rendition.objects.filter(filter_spec='width-102').exists()
+
+    # once the serve view generates the rendition
+    Rendition.objects.create(image_id=1, filter_spec='width-102', focal_point_key='',
+                             file='images/download.width-102.png', width=102, height=102)
+    images, _ = _rendition_queries(client, 'width-102')
+    assert images[0]['urlLink'] == '/media/images/download.width-102.png'
+
+
+def _fake_get_rendition(image, filter_spec):
+    from wagtail.images.models import Filter, Rendition
+    spec = filter_spec.spec if isinstance(filter_spec, Filter) else filter_spec
+    return Rendition.objects.create(image=image, filter_spec=spec, focal_point_key='',
+                                    file='images/generated.png', width=1, height=1)
+
+
+@pytest.mark.django_db
+def test_missing_renditions_in_background(client, monkeypatch):
+    from wagtail.images.models import Image
+    monkeypatch.setattr('wagtail_graphql.loaders.MISSING_RENDITIONS', 'background')
+    monkeypatch.setattr('wagtail_graphql.renditions.rendition_pool.max_workers', 0)
+    monkeypatch.setattr(Image, 'get_rendition', _fake_get_rendition)
+
+    images, _ = _rendition_queries(client, 'width-104')
+    assert images[0]['urlLink'].endswith('/1/width-104/')
+    images, _ = _rendition_queries(client, 'width-104')
+    assert images[0]['urlLink'] == '/media/images/generated.png'
+
+    monkeypatch.setattr('wagtail_graphql.types.images.RENDITION_PLACEHOLDER', '/static/placeholder.png')
+    images, _ = _rendition_queries(client, 'width-105')
+    assert images == [{'urlLink': '/static/placeholder.png'}, {'urlLink': '/static/placeholder.png'}]
+
+
+@pytest.mark.django_db
+def test_warm_renditions_command(monkeypatch):
+    from io import StringIO
+    from django.core.management import call_command
+    from wagtail.images.models import Image, Rendition
+    monkeypatch.setattr(Image, 'get_rendition', _fake_get_rendition)
+
+    out = StringIO()
+    call_command('warm_renditions', 'max-165x165', 'width-106', workers=0, stdout=out)
+    assert out.getvalue().strip() == '2 renditions generated, 0 failed'
+    assert Rendition.objects.filter(filter_spec='width-106').count() == 2
+
+    # duplicate specs are generated once
+    out = StringIO()
+    call_command('warm_renditions', 'width-50', 'width-50', workers=0, stdout=out)
+    assert out.getvalue().strip() == '2 renditions generated, 0 failed'
+    assert Rendition.objects.filter(filter_spec='width-50').count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_image_urls():
+    from django.urls import reverse
+    from wagtail.images.views.serve import generate_signature
+    from wagtail_graphql.types.images import ImageUrlBuilder
+
+    keys = [(1, 'original'), (2, 'fill-300x150|jpegquality-60'), (12, 'width-100')]
+    builder = ImageUrlBuilder()
+    assert builder.urls(keys) == [
+        reverse('wagtailimages_serve', args=(generate_signature(pk, spec), pk, spec)) for pk, spec in keys
+    ]
+    assert builder.url(1, 'original') == builder.urls(keys)[0]
+
+    # patterns that can't be reversed with placeholders fall back to reverse
+    builder.template = lambda: None
+    assert builder.urls(keys) == ImageUrlBuilder().urls(keys)
+
+
+@pytest.mark.django_db
+def test_images_list_urls(client):
+    from wagtail.images.models import Image
+    from wagtail_graphql.types.images import filter_spec, generate_image_url
+    query = '{ images { url ... on Image { small: url(rendition: "max-165x165") } } }'
+    response = client.post('/graphql', {"query": query})
+    assert response.json()['data']['images'] == [
+        {'url': generate_image_url(image, filter_spec(image, None)), 'small': generate_image_url(image, 'max-165x165')}
+        for image in Image.objects.order_by('pk')
+    ]
@@ -0,0 +1,160 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
+
+PAGES_QUERY = '{ pages { id children { id children { id } } } }'
+IMAGES_QUERY = '{ images { id } }'
+
+
+def _restrict_page(page_id, restriction_type, groups=()):
+    from wagtail.core.models import PageViewRestriction
+    restriction = PageViewRestriction.objects.create(page_id=page_id, restriction_type=restriction_type)
+    restriction.groups.set(groups)
+    return restriction
+
+
+def _login(client, username='user1'):
+    from django.contrib.auth.models import User
+    user = User.objects.get(username=username)
+    client.force_login(user)
+    return user
+
+
+def _page_ids(pages):
+    ids = set()
+    for page in pages:
+        ids.add(page['id'])
+        ids.update(_page_ids(page.get('children') or []))
+    return ids
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_page_restrictions_are_all_applied(client):
+    from wagtail.core.models import PageViewRestriction
+    _login(client)
+    _restrict_page(4, PageViewRestriction.GROUPS, [2])
+    _restrict_page(5, PageViewRestriction.PASSWORD)
+    _restrict_page(6, PageViewRestriction.GROUPS, [3])
+
+    response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert 'errors' not in response.json()
+    # user1 belongs to 'Group 1'
+    assert _page_ids(response.json()['data']['pages']) == {3, 6}
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_login_restriction(client):
+    from wagtail.core.models import PageViewRestriction
+    _restrict_page(5, PageViewRestriction.LOGIN)
+
+    response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert 5 not in _page_ids(response.json()['data']['pages'])
+
+    _login(client)
+    response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert 5 in _page_ids(response.json()['data']['pages'])
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_page_restrictions_loaded_once_per_request(client):
+    from wagtail.core.models import PageViewRestriction
+    _login(client)
+    _restrict_page(4, PageViewRestriction.GROUPS, [2])
+    _restrict_page(5, PageViewRestriction.GROUPS, [1, 2])
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert 'errors' not in response.json()
+
+    restriction_queries = [q for q in ctx.captured_queries
+                           if 'wagtailcore_pageviewrestriction' in q['sql']]
+    assert len(restriction_queries) == 2    # restrictions + prefetched groups
+
+    # warm index
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert 'errors' not in response.json()
+    assert not [q for q in ctx.captured_queries
+                if 'viewrestriction' in q['sql'] or 'auth_user_groups' in q['sql']]
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_restriction_index_invalidation(client):
+    from django.contrib.auth.models import Group
+    from wagtail.core.models import PageViewRestriction
+    user = _login(client)
+
+    response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert _page_ids(response.json()['data']['pages']) == {3, 4, 5, 6}
+
+    restriction = _restrict_page(5, PageViewRestriction.GROUPS, [2])
+    response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert _page_ids(response.json()['data']['pages']) == {3, 4, 6}
+
+    user.groups.add(Group.objects.get(id=2))
+    response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert _page_ids(response.json()['data']['pages']) == {3, 4, 5, 6}
+
+    user.groups.remove(Group.objects.get(id=2))
+    restriction.delete()
+    response = client.post('/graphql', {"query": PAGES_QUERY})
+    assert _page_ids(response.json()['data']['pages']) == {3, 4, 5, 6}
+
+
+@pytest.mark.django_db
+def test_restriction_index_django_cache():
+    from wagtail.core.models import PageViewRestriction
+    from wagtail_graphql.permissions import RestrictionIndex
+    index = RestrictionIndex('default')
+    index.clear()
+
+    assert index.restricted(True, frozenset([3])) == ((), ())
+    _restrict_page(4, PageViewRestriction.LOGIN)
+    # this index isn't connected to the signals
+    assert index.restricted(False, frozenset()) == ((), ())
+    index.clear()
+    assert index.restricted(True, frozenset([3])) == ((), ())
+    assert index.restricted(False, frozenset()) == (('000100010001', ), ())
+
+
+@pytest.mark.django_db
+def test_collection_restrictions(client):
+    from wagtail.core.models import CollectionViewRestriction
+    _login(client)
+    restriction = CollectionViewRestriction.objects.create(
+        collection_id=2, restriction_type=CollectionViewRestriction.GROUPS)
+    restriction.groups.set([2])
+
+    response = client.post('/graphql', {"query": IMAGES_QUERY})
+    assert response.json() == {'data': {'images': [{'id': '1'}]}}
+
+    restriction.groups.add(3)
+    response = client.post('/graphql', {"query": IMAGES_QUERY})
+    assert response.json() == {'data': {'images': [{'id': '1'}, {'id': '2'}]}}
+
+
+@pytest.mark.django_db
+def test_restriction_index_local_expiry(monkeypatch):
+    from wagtail.core.models import PageViewRestriction
+    from wagtail_graphql.permissions import RestrictionIndex
+    now = [1000.0]
+    monkeypatch.setattr('wagtail_graphql.permissions.monotonic', lambda: now[0])
+    index = RestrictionIndex(maxsize=2, timeout=5)
+
+    assert index.restricted(False, frozenset()) == ((), ())
+    # e.g. saved in another process, this index isn't cleared
+    _restrict_page(4, PageViewRestriction.LOGIN)
+    assert index.restricted(False, frozenset()) == ((), ())
+    now[0] += 6
+    assert index.restricted(False, frozenset()) == (('000100010001', ), ())
+
+    # scopes and the restrictions they're built from
+    index.restricted(True, frozenset([1]))
+    index.restricted(True, frozenset([2]))
+    assert len(index._local) == 2
@@ -0,0 +1,121 @@
+import json
+import os
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+QUERY = '{ format }'
+HASH = 'a' * 64
+
+
+def _post(client, body):
+    return client.post('/graphql', json.dumps(body), content_type='application/json')
+
+
+def _extensions(hash_):
+    return {'persistedQuery': {'version': 1, 'sha256Hash': hash_}}
+
+
+@pytest.fixture
+def registry(tmpdir, monkeypatch):
+    from wagtail_graphql.persisted import DirectoryQueryStore, PersistedQueryRegistry
+    from wagtail_graphql.views import GraphQLView
+    registry = PersistedQueryRegistry(DirectoryQueryStore(str(tmpdir)))
+    monkeypatch.setattr(GraphQLView, 'persisted_queries', registry)
+    monkeypatch.setattr('wagtail_graphql.management.commands.load_persisted_queries.persisted_queries', registry)
+    return registry
+
+
+@pytest.mark.django_db
+def test_automatic_persisted_query(client, registry):
+    from wagtail_graphql.persisted import query_hash
+    hash_ = query_hash(QUERY)
+
+    response = _post(client, {'extensions': _extensions(hash_)})
+    assert response.status_code == 200
+    assert response.json()['errors'][0]['message'] == 'PersistedQueryNotFound'
+    assert response.json()['errors'][0]['extensions'] == {'code': 'PERSISTED_QUERY_NOT_FOUND'}
+
+    response = _post(client, {'query': QUERY, 'extensions': _extensions(hash_)})
+    assert response.json() == {'data': {'format': '0.2.0'}}
+
+    response = _post(client, {'extensions': _extensions(hash_)})
+    assert response.json() == {'data': {'format': '0.2.0'}}
+
+    # GET requests send the extensions as JSON
+    response = client.get('/graphql', {'extensions': json.dumps(_extensions(hash_))})
+    assert response.json() == {'data': {'format': '0.2.0'}}
+    # automatic registrations aren't written to the store
+    assert registry.store.get(hash_) is None
+
+
+@pytest.mark.django_db
+def test_automatic_persisted_queries_are_bounded(client, registry):
+    from wagtail_graphql.persisted import query_hash
+    registry.maxsize = 2
+    queries = ['{ format }', '{ f: format }', '{ g: format }']
+    for query in queries:
+        _post(client, {'query': query, 'extensions': _extensions(query_hash(query))})
+    assert len(registry._queries) == 2
+    assert len(registry._documents) == 2
+
+    response = _post(client, {'extensions': _extensions(query_hash(queries[0]))})
+    assert response.json()['errors'][0]['message'] == 'PersistedQueryNotFound'
+    response = _post(client, {'extensions': _extensions(query_hash(queries[2]))})
+    assert response.json() == {'data': {'g': '0.2.0'}}
+
+
+@pytest.mark.django_db
+def test_persisted_query_skips_parsing_and_validation(client, registry, monkeypatch):
+    from wagtail_graphql.persisted import query_hash
+    hash_ = query_hash(QUERY)
+    _post(client, {'query': QUERY, 'extensions': _extensions(hash_)})
+
+    def fail(*args, **kwargs):
+        raise AssertionError('parsed again')
+    monkeypatch.setattr('wagtail_graphql.backend.parse', fail)
+    monkeypatch.setattr('wagtail_graphql.backend.validate', fail)
+    monkeypatch.setattr('graphql.backend.core.validate', fail)
+
+    with CaptureQueriesContext(connection):
+        response = _post(client, {'extensions': _extensions(hash_)})
+    assert response.json() == {'data': {'format': '0.2.0'}}
+
+
+@pytest.mark.django_db
+def test_persisted_query_errors(client, registry):
+    from wagtail_graphql.persisted import query_hash
+
+    response = _post(client, {'query': QUERY, 'extensions': _extensions(HASH)})
+    assert response.status_code == 400
+    assert response.json()['errors'][0]['message'] == 'provided sha does not match query'
+
+    # invalid queries aren't registered
+    invalid = '{ notAField }'
+    response = _post(client, {'query': invalid, 'extensions': _extensions(query_hash(invalid))})
+    assert response.status_code == 400
+    assert registry.get(query_hash(invalid)) is None
+
+    registry.automatic = False
+    response = _post(client, {'query': QUERY, 'extensions': _extensions(query_hash(QUERY))})
+    assert response.json()['errors'][0]['message'] == 'PersistedQueryNotSupported'
+
+
+@pytest.mark.django_db
+def test_load_persisted_queries(client, registry, tmpdir, capsys):
+    from wagtail_graphql.persisted import query_hash
+    directory = os.path.join(os.path.dirname(__file__), 'graphql')
+    manifest = str(tmpdir.join('manifest.json'))
+    call_command('load_persisted_queries', directory, manifest=manifest)
+
+    with open(manifest) as f:
+        hashes = json.load(f)
+    with open(os.path.join(directory, 'image_1.graphql')) as f:
+        assert hashes['image_1.graphql'] == query_hash(f.read())
+    # queries for the other relay setting don't validate and are skipped
+    assert 'Cannot query field' in capsys.readouterr().err
+    assert len(hashes) < len([name for name in os.listdir(directory) if name.endswith('.graphql')])
+
+    response = _post(client, {'extensions': _extensions(hashes['image_1.graphql'])})
+    assert response.json()['data']['image']['id'] == '1'
@@ -0,0 +1,100 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
+
+FRAGMENTS_QUERY = '''
+fragment Form on Test_app_1FormPage {
+  formFields { name }
+  owner { username }
+}
+fragment Home on Test_app_1HomePage {
+  owner { username }
+}
+query {
+  pages {
+    title
+    ... on Page { ...Form }
+    ...Home
+  }
+}
+'''
+
+
+def _queries(client, query):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', {"query": query})
+    assert 'errors' not in response.json()
+    return response.json(), [q['sql'] for q in ctx.captured_queries]
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_plan_relations_from_fragments(client):
+    client.post('/graphql', {"query": FRAGMENTS_QUERY})
+    result, queries = _queries(client, FRAGMENTS_QUERY)
+
+    assert result['data']['pages'][3] == {
+        'title': 'Form',
+        'formFields': [{'name': 'label-1'}, {'name': 'other-label'}],
+        'owner': {'username': 'admin'},
+    }
+    # owners are joined, form fields prefetched
+    assert not [q for q in queries if q.startswith('SELECT "auth_user"')]
+    assert len([q for q in queries if 'FROM "test_app_1_formfield"' in q]) == 1
+    assert len([q for q in queries if 'INNER JOIN "auth_user"' in q or 'LEFT OUTER JOIN "auth_user"' in q]) == 2
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_plan_only_selected_columns(client):
+    _, queries = _queries(client, '{ page(id: 4) { title ... on Test_app_2PageTypeA { another { __typename } } } }')
+    specific = [q for q in queries if 'FROM "test_app_2_pagetypea"' in q]
+    assert len(specific) == 1
+    assert '"test_app_2_pagetypea"."another"' in specific[0]
+    assert '"test_app_2_pagetypea"."streamfield"' not in specific[0]
+    assert '"wagtailcore_page"."seo_title"' not in specific[0]
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_plan_revisions(client):
+    _, queries = _queries(client, '{ page(id: 4, revision: -1) { title } }')
+    specific = [q for q in queries if 'FROM "test_app_2_pagetypea"' in q]
+    assert '"test_app_2_pagetypea"."streamfield"' not in specific[0]
+    assert '"wagtailcore_page"."first_published_at"' in specific[0]
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_plan_show_in_menus(client):
+    _, queries = _queries(client, '{ showInMenus { title } }')
+    pages = [q for q in queries if 'FROM "wagtailcore_page"' in q]
+    assert len(pages) == 1
+    assert '"wagtailcore_page"."title"' in pages[0]
+    assert '"wagtailcore_page"."search_description"' not in pages[0]
+
+
+@pytest.mark.skipif(not IS_RELAY, reason="requires the relay setting to be off")
+@pytest.mark.django_db
+def test_plan_connection_nodes(client):
+    query = '{ pages { edges { node { ... on Test_app_1HomePage { owner { username } } } } } }'
+    _, queries = _queries(client, query)
+    assert not [q for q in queries if q.startswith('SELECT "auth_user"')]
+
+
+def test_plan_maps_graphql_names_to_fields():
+    import graphene
+    from graphql.language.ast import Field, Name
+    from wagtail.core.models import Page
+    from wagtail_graphql.planner import _attnames, _model_plan
+
+    PlannedPage = type('PlannedPage', (graphene.ObjectType,), {
+        'seo_title_2': graphene.String(),
+        'search_description': graphene.String(name='summary'),
+    })
+    assert _attnames(PlannedPage) == {'seoTitle2': 'seo_title_2', 'summary': 'search_description'}
+
+    plan = _model_plan(Page, PlannedPage, [(None, Field(name=Name('summary')))], ())
+    assert 'search_description' in plan.only
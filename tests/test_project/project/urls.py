@@ -7,7 +7,7 @@ from wagtail.core import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+from wagtail_graphql.views import GraphQLView
 from wagtail.images.views.serve import ServeView
 
 
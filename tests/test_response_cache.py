@@ -0,0 +1,197 @@
+import json
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
+
+PAGES_QUERY = 'query Page($id: Int) { page(id: $id) { title } }'
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    from django.core.cache import cache
+    from wagtail_graphql.response_cache import response_cache
+    # the signal handlers invalidate the default instance
+    monkeypatch.setattr(response_cache, 'cache_alias', 'default')
+    monkeypatch.setattr(response_cache, 'excluded', set(response_cache.excluded))
+    cache.clear()
+    yield response_cache
+    cache.clear()
+
+
+def _post(client, query, variables=None):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post('/graphql', json.dumps({'query': query, 'variables': variables}),
+                               content_type='application/json')
+    return response.json(), len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_response_cache(client, response_cache):
+    result, _ = _post(client, PAGES_QUERY, {'id': 4})
+    assert result == {'data': {'page': {'title': 'TEST'}}}
+    cached, count = _post(client, PAGES_QUERY, {'id': 4})
+    assert cached == result
+    assert count == 1   # the site lookup of the middleware
+
+    result, count = _post(client, PAGES_QUERY, {'id': 5})
+    assert result == {'data': {'page': {'title': 'Blank Page'}}}
+    assert count > 1
+
+
+@pytest.mark.django_db
+def test_response_cache_permissions(client, response_cache):
+    from django.contrib.auth.models import User
+    from wagtail.core.models import PageViewRestriction
+    restriction = PageViewRestriction.objects.create(page_id=4, restriction_type=PageViewRestriction.LOGIN)
+
+    assert _post(client, PAGES_QUERY, {'id': 4})[0] == {'data': {'page': None}}
+    client.force_login(User.objects.get(username='user1'))
+    assert _post(client, PAGES_QUERY, {'id': 4})[0] == {'data': {'page': {'title': 'TEST'}}}
+
+    restriction.delete()
+    client.logout()
+    assert _post(client, PAGES_QUERY, {'id': 4})[0] == {'data': {'page': {'title': 'TEST'}}}
+
+
+@pytest.mark.django_db
+def test_response_cache_excluded_fields(client, response_cache):
+    from django.contrib.auth.models import User
+    query = 'fragment U on Query { user { username } } { ...U }'
+    assert _post(client, query)[0] == {'data': {'user': {'username': 'anonymous'}}}
+    client.force_login(User.objects.get(username='user1'))
+    assert _post(client, query)[0] == {'data': {'user': {'username': 'user1'}}}
+
+    response_cache.exclude('Page.title')
+    _post(client, PAGES_QUERY, {'id': 4})
+    assert _post(client, PAGES_QUERY, {'id': 4})[1] > 1
+
+
+@pytest.mark.django_db
+def test_response_cache_skips_mutations_and_errors(client, response_cache):
+    from wagtail_graphql.backend import document_cache
+    from wagtail_graphql.schema import schema
+    document = document_cache.document_from_string(schema, 'mutation { logout { user { username } } }')
+    assert not response_cache.cacheable(document, None)
+
+    _post(client, '{ page(id: 4, revision: 100) { id } }')
+    result, count = _post(client, '{ page(id: 4, revision: 100) { id } }')
+    assert 'errors' in result
+    assert count > 1
+
+
+def _cached(client, query, variables=None):
+    """Whether a query is answered from the cache, i.e. only looking up the site and the restrictions."""
+    with CaptureQueriesContext(connection) as ctx:
+        client.post('/graphql', json.dumps({'query': query, 'variables': variables}), content_type='application/json')
+    return not [q for q in ctx.captured_queries
+                if 'FROM "wagtailcore_site"' not in q['sql'] and 'viewrestriction' not in q['sql']]
+
+
+@pytest.mark.django_db
+def test_response_cache_invalidation_by_page(client, response_cache):
+    from wagtail.core.models import Page
+    pages_query = '{ pages { edges { node { title } } } }' if IS_RELAY else '{ pages { title } }'
+    for query, variables in ((PAGES_QUERY, {'id': 4}), (PAGES_QUERY, {'id': 5}), (pages_query, None)):
+        _post(client, query, variables)
+        assert _cached(client, query, variables)
+
+    page = Page.objects.get(id=5).specific
+    page.title = 'Another Title'
+    page.save_revision().publish()
+
+    assert _cached(client, PAGES_QUERY, {'id': 4})
+    assert _post(client, PAGES_QUERY, {'id': 5})[0] == {'data': {'page': {'title': 'Another Title'}}}
+    assert 'Another Title' in json.dumps(_post(client, pages_query)[0]['data']['pages'])
+
+    page.unpublish()
+    assert _cached(client, PAGES_QUERY, {'id': 4})
+    assert _post(client, PAGES_QUERY, {'id': 5})[0] == {'data': {'page': None}}
+
+
+@pytest.mark.django_db
+def test_response_cache_invalidation_by_tree(client, response_cache):
+    from wagtail.core.models import Page
+    query = '{ page(url: "/new-page") { title } }'
+    assert _post(client, query)[0] == {'data': {'page': None}}
+    assert _cached(client, query)
+
+    parent = Page.objects.get(id=3)
+    page = parent.add_child(instance=Page(title='New Page', slug='new-page', live=False))
+    assert _cached(client, query)
+    page.save_revision().publish()
+    assert _post(client, query)[0] == {'data': {'page': {'title': 'New Page'}}}
+
+
+@pytest.mark.django_db
+def test_response_cache_invalidation_by_model(client, response_cache):
+    from wagtail.images.models import Image
+    images_query = '{ images { title } }'
+    image_query = 'query Image($id: Int!) { image(id: $id) { title } }'
+    for query, variables in ((images_query, None), (image_query, {'id': 1}), (image_query, {'id': 2}),
+                             (PAGES_QUERY, {'id': 4})):
+        _post(client, query, variables)
+        assert _cached(client, query, variables)
+
+    image = Image.objects.get(id=1)
+    image.title = 'Another Title'
+    image.save()
+    assert not _cached(client, images_query)
+    assert _post(client, image_query, {'id': 1})[0] == {'data': {'image': {'title': 'Another Title'}}}
+    assert _cached(client, image_query, {'id': 2})
+    assert _cached(client, PAGES_QUERY, {'id': 4})
+
+
+@pytest.mark.django_db
+def test_response_cache_invalidation_by_move(client, response_cache):
+    from wagtail.core.models import Page
+    query = '{ page(id: 5) { urlPath } }'
+    assert _post(client, query)[0] == {'data': {'page': {'urlPath': '/blank-page'}}}
+
+    Page.objects.get(id=5).move(Page.objects.get(id=4), pos='last-child')
+    assert _post(client, query)[0] == {'data': {'page': {'urlPath': '/test/blank-page'}}}
+
+
+def _preview_client(client_class, title):
+    from django.contrib.auth.models import User
+    from urllib.parse import urlencode
+    client = client_class()
+    client.force_login(User.objects.get(username='admin'))
+    session = client.session
+    session['wagtail-preview-5'] = (urlencode({'title': title, 'slug': 'blank'}), 0)
+    session.save()
+    return client
+
+
+@pytest.mark.django_db
+def test_response_cache_skips_previews(client, response_cache):
+    query = '{ preview(id: 5) { title } }'
+    first = _preview_client(type(client), 'First draft')
+    second = _preview_client(type(client), 'Second draft')
+
+    assert _post(first, query)[0] == {'data': {'preview': {'title': 'First draft'}}}
+    assert _post(second, query)[0] == {'data': {'preview': {'title': 'Second draft'}}}
+    assert _post(first, query)[0] == {'data': {'preview': {'title': 'First draft'}}}
+
+
+@pytest.mark.django_db
+def test_response_cache_skips_responses_invalidated_while_running(response_cache):
+    generation = response_cache.generation()
+    response_cache.invalidate(['page:4'])
+    response_cache.set('running', {'page': None}, ['page:4'], generation)
+    assert response_cache.get('running') is None
+
+    response_cache.set('running', {'page': None}, ['page:4'], response_cache.generation())
+    assert response_cache.get('running') == {'page': None}
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_response_cache_sibling_reorder(client, response_cache):
+    from wagtail.core.models import Page
+    query = '{ page(id: 3) { children { id } } }'
+    assert _post(client, query)[0]['data']['page']['children'] == [{'id': 4}, {'id': 5}, {'id': 6}]
+
+    Page.objects.get(id=6).move(Page.objects.get(id=4), 'left')
+    assert _post(client, query)[0]['data']['page']['children'] == [{'id': 6}, {'id': 4}, {'id': 5}]
@@ -0,0 +1,17 @@
+def test_schema_is_memoized():
+    from wagtail_graphql import schema as schema_module
+
+    assert schema_module.get_schema() is schema_module.get_schema()
+    assert schema_module.schema is schema_module.get_schema()
+
+
+def test_build_schema_without_database():
+    # the database isn't available to this test
+    from wagtail_graphql.schema import build_schema, build_timings
+
+    schema = build_schema()
+    assert schema.get_type('Test_app_2PageTypeA') is not None
+    assert list(build_timings) == [
+        'base page', 'app test_app_1', 'app test_app_2', 'query', 'mutation', 'schema', 'total'
+    ]
+    assert build_timings['total'] >= sum(v for k, v in build_timings.items() if k != 'total')
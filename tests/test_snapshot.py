@@ -0,0 +1,51 @@
+import json
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def test_schema_snapshot(tmpdir):
+    from wagtail_graphql.snapshot import model_signature
+    path = str(tmpdir.join('schema.json'))
+    call_command('graphql_schema_snapshot', path)
+
+    with open(path) as f:
+        data = json.load(f)
+    assert data['signature'] == model_signature()
+    assert data['types']['pages']['test_app_2.PageTypeA'] == 'Test_app_2PageTypeA'
+    assert 'Test_app_2PageTypeAStreamfieldType' in data['unions']
+    assert 'Test_app_2PageTypeA' in data['interfaces']['Page']
+    assert 'type Query' in data['schema']
+
+    call_command('graphql_schema_snapshot', path, check=True)
+
+
+def test_schema_snapshot_check(tmpdir):
+    path = str(tmpdir.join('schema.json'))
+    with pytest.raises(CommandError):
+        call_command('graphql_schema_snapshot', path, check=True)
+
+    tmpdir.join('schema.json').write(json.dumps({'signature': 'stale'}))
+    with pytest.raises(CommandError, match='out of date'):
+        call_command('graphql_schema_snapshot', path, check=True)
+
+
+def test_model_signature():
+    from wagtail_graphql.settings import SETTINGS
+    from wagtail_graphql.snapshot import model_signature
+
+    assert model_signature() == model_signature()
+    assert model_signature(dict(SETTINGS, APPS=['test_app_1'])) != model_signature()
+    assert model_signature(dict(SETTINGS, RELAY=not SETTINGS.get('RELAY', False))) != model_signature()
+
+
+@pytest.mark.parametrize('argv, serving', [
+    (['gunicorn', 'project.wsgi'], True),
+    (['manage.py', 'runserver'], True),
+    (['manage.py', 'migrate'], False),
+    (['/usr/bin/django-admin', 'makemigrations'], False),
+])
+def test_schema_is_only_prebuilt_when_serving(monkeypatch, argv, serving):
+    from wagtail_graphql.apps import _is_serving
+    monkeypatch.setattr('sys.argv', argv)
+    assert _is_serving() is serving
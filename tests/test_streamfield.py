@@ -1,6 +1,9 @@
+import json
+from functools import partial
 import pytest
 from .graphql import assert_query
 from django.conf import settings
+from django.utils.translation import gettext_lazy
 IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
 
 
@@ -14,3 +17,190 @@ def test_streamfield_scalar_blocks(client):
 @pytest.mark.django_db
 def test_streamfield_scalar_blocks_relay(client):
     assert_query(client, 'test_app_2', 'streamfield', 'relay')
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_streamfield_choosers_are_batched(client, django_assert_max_num_queries):
+    # force loading the api and warm up the restriction index
+    assert_query(client, 'test_app_2', 'streamfield')
+    with django_assert_max_num_queries(8):
+        assert_query(client, 'test_app_2', 'streamfield')
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_streamfield_skips_unselected_blocks(client, django_assert_num_queries):
+    query = '''
+    fragment Snippet on Test_app_2App2SnippetBlock { value { text } }
+    query {
+      page(id: 4) {
+        ... on Test_app_2PageTypeA {
+          links { ... on ImageBlock { value { title } } ...Snippet }
+          another { __typename ... on IntBlock { value } }
+        }
+      }
+    }
+    '''
+    response = client.post('/graphql', {"query": query})
+    assert response.json() == {'data': {'page': {
+        'links': [
+            {'value': {'title': 'wagtail logo with focal point'}},
+            {'value': {'text': 'sdjfkhdskjsdf'}},
+            {'value': {'title': 'wagtail logo'}},
+        ],
+        'another': [
+            {'__typename': 'StringBlock'},
+            {'__typename': 'IntBlock', 'value': 1000},
+            {'__typename': 'StringBlock'},
+        ],
+    }}}
+    # the page block is never resolved
+    with django_assert_num_queries(5):
+        client.post('/graphql', {"query": query})
+
+
+@pytest.mark.django_db
+def test_streamfield_pagination(client):
+    query = '''
+    query($first: Int, $offset: Int) {
+      page(id: 4) {
+        ... on Test_app_2PageTypeA {
+          links(first: $first, offset: $offset) { ... on ImageBlock { value { title } } }
+          another(offset: 1) { __typename }
+        }
+      }
+    }
+    '''
+
+    def links(**variables):
+        response = client.post('/graphql', json.dumps({"query": query, "variables": variables}),
+                               content_type='application/json')
+        assert response.json()['data']['page']['another'] == [{'__typename': 'IntBlock'}, {'__typename': 'StringBlock'}]
+        return [b['value']['title'] for b in response.json()['data']['page']['links']]
+
+    assert links(first=1) == ['wagtail logo with focal point']
+    assert links(offset=1) == ['wagtail logo']
+    # positions in the stream, including the blocks that aren't selected
+    assert links(first=1, offset=1) == []
+    assert links(first=1, offset=3) == ['wagtail logo']
+    assert links(first=0) == []
+    assert links(offset=5) == []
+
+    response = client.post('/graphql', {
+        "query": '{ page(id: 4) { ... on Test_app_2PageTypeA { links(first: -1) { __typename } } } }'
+    })
+    assert response.json()['errors'][0]['message'] == "'first' and 'offset' must be non-negative"
+
+
+def test_block_types_are_shared():
+    from wagtail.core import blocks
+    from wagtail_graphql.types.streamfield import block_handler, _create_root_blocks
+    from test_app_2.models import CustomBlock1
+
+    char_list = block_handler(blocks.ListBlock(blocks.CharBlock()), 'test_app_2')
+    assert block_handler(blocks.ListBlock(blocks.CharBlock(required=False)), 'test_app_2') is char_list
+    assert block_handler(blocks.ListBlock(blocks.TextBlock()), 'test_app_2') is not char_list
+    assert block_handler(blocks.ListBlock(CustomBlock1()), 'test_app_2') is \
+        block_handler(blocks.ListBlock(CustomBlock1()), 'test_app_2')
+
+    first = {'char': char_list, 'int': block_handler(blocks.IntegerBlock(), 'test_app_2')}
+    second = dict(first)
+    _create_root_blocks(first)
+    _create_root_blocks(second)
+    assert first == second
+    assert first['char'][1] is second['char'][1]
+
+
+def test_custom_block_signatures():
+    import graphene
+    from wagtail.core import blocks
+    from wagtail_graphql.types.streamfield import block_handler, block_signature
+
+    class Upper(graphene.String):
+        pass
+
+    class Number(graphene.Int):
+        pass
+
+    class SuffixBlock(blocks.CharBlock):
+        def __init__(self, suffix='', **kwargs):
+            super().__init__(**kwargs)
+            self.suffix = suffix
+
+        def __graphql_type__(self):
+            return Upper
+
+        def __graphql_resolve__(self, value, _info):
+            return value + self.suffix
+
+    class NumberBlock(SuffixBlock):
+        def __graphql_type__(self):
+            return Number
+
+    block = SuffixBlock('!')
+    assert block_signature(block) is block_signature(block)
+    assert block_signature(Upper) != block_signature(Number)
+    assert block_signature(SuffixBlock('!')) == block_signature(block)
+    assert block_signature(SuffixBlock('?')) != block_signature(block)
+    assert block_signature(NumberBlock('!')) != block_signature(block)
+
+    _, convert = block_handler(block, 'test_app_2')
+    _, other = block_handler(SuffixBlock('?'), 'test_app_2')
+    assert (convert('a', None), other('a', None)) == ('a!', 'a?')
+
+    # signatures don't depend on object addresses
+    assert block_signature(SuffixBlock(partial(str, 1))) == block_signature(SuffixBlock(partial(str, 1)))
+    labelled = [SuffixBlock(label=gettext_lazy('Suffix')) for _ in range(2)]
+    assert block_signature(labelled[0]) == block_signature(labelled[1])
+
+
+def test_struct_blocks_of_a_class_differ_by_children():
+    from wagtail.core import blocks
+    from wagtail_graphql.types.streamfield import block_handler
+
+    chars = block_handler(blocks.StructBlock([('a', blocks.CharBlock())]), 'test_app_2', 'Prefix')
+    ints = block_handler(blocks.StructBlock([('a', blocks.IntegerBlock())]), 'test_app_2', 'Prefix')
+    assert chars is not ints
+    assert chars._meta.name == 'PrefixStructBlock'
+    assert ints._meta.name == 'PrefixStructBlock_2'
+    assert block_handler(blocks.StructBlock([('a', blocks.CharBlock())]), 'test_app_2', 'Prefix') is chars
+
+
+@pytest.mark.django_db
+def test_struct_block_fields(rf):
+    import graphene
+    from wagtail_graphql.registry import registry
+    from wagtail_graphql.schema import get_schema
+    from test_app_2.models import PageTypeA
+    get_schema()
+
+    class Query(graphene.ObjectType):
+        page = graphene.Field(registry.pages[PageTypeA])
+
+        def resolve_page(self, _info):
+            return PageTypeA(title='Blocks', custom=json.dumps([{'type': 'custom1', 'value': {
+                'field_list_2': [{'field_text': 'inner'}], 'field_date': '2019-01-02',
+                'field_datetime': '2019-01-02T10:30:00Z', 'field_time': '10:30:00',
+            }}]))
+
+    result = graphene.Schema(query=Query).execute('''{ page { custom { ... on Test_app_2CustomBlock1 {
+        fieldList2 { fieldText } fieldDate fieldDatetime fieldTime fieldInt
+    } } } }''', context_value=rf.get('/graphql'))
+    assert not result.errors
+    assert result.data['page']['custom'] == [{
+        'fieldList2': [{'fieldText': 'inner'}],
+        'fieldDate': '2019-01-02',
+        'fieldDatetime': '2019-01-02T10:30:00+00:00',
+        'fieldTime': '10:30:00',
+        'fieldInt': None,
+    }]
+
+
+def test_date_parsers_without_fromisoformat(monkeypatch):
+    import datetime
+    from wagtail_graphql.types import streamfield
+    monkeypatch.setattr(streamfield, '_FROMISOFORMAT', False)
+    assert streamfield._parse_date('2019-01-01') == datetime.datetime(2019, 1, 1)
+    assert streamfield._parse_datetime('2019-01-01T10:30:00') == datetime.datetime(2019, 1, 1, 10, 30)
+    assert streamfield._parse_time('10:30:00') == datetime.time(10, 30)
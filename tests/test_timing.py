@@ -0,0 +1,78 @@
+import socket
+import pytest
+from django.conf import settings
+IS_RELAY = settings.GRAPHQL_API.get('RELAY', False)
+
+IMAGES_QUERY = '{ images { id url } }'
+
+
+def _login(client, username='admin'):
+    from django.contrib.auth.models import User
+    user = User.objects.get(username=username)
+    client.force_login(user)
+    return user
+
+
+@pytest.mark.django_db
+def test_timing_extensions(client):
+    response = client.post('/graphql', {"query": IMAGES_QUERY}, HTTP_X_GRAPHQL_TIMING='1')
+    assert 'extensions' not in response.json()
+
+    user = _login(client)
+    assert user.is_staff
+    response = client.post('/graphql', {"query": IMAGES_QUERY}, HTTP_X_GRAPHQL_TIMING='1')
+    timing = response.json()['extensions']['timing']
+    assert set(timing['resolvers']) == {'images', 'images.id', 'images.url'}
+    assert timing['resolvers']['images']['calls'] == 1
+    assert timing['resolvers']['images']['queries'] >= 1
+    assert timing['resolvers']['images.url']['calls'] == 2
+    assert timing['queries'] >= timing['resolvers']['images']['queries']
+    assert response.json()['data']['images'][0]['id'] == '1'
+
+    response = client.post('/graphql', {"query": IMAGES_QUERY})
+    assert 'extensions' not in response.json()
+
+
+@pytest.mark.skipif(IS_RELAY, reason="requires the relay setting")
+@pytest.mark.django_db
+def test_timing_paths_name_concrete_types(client):
+    _login(client)
+    query = '{ pages { children { title } } }'
+    response = client.post('/graphql', {"query": query}, HTTP_X_GRAPHQL_TIMING='1')
+    resolvers = response.json()['extensions']['timing']['resolvers']
+    assert 'pages.Test_app_1HomePage.children' in resolvers
+    assert 'pages.Test_app_1HomePage.children.Test_app_1FormPage.title' in resolvers
+
+
+@pytest.mark.django_db
+def test_timing_sinks(client, monkeypatch):
+    from wagtail_graphql.timing import PrometheusSink, StatsdSink, metrics_view, resolver_timing
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(5)
+    prometheus = PrometheusSink()
+    statsd = StatsdSink(*receiver.getsockname(), prefix='api')
+    monkeypatch.setattr(resolver_timing, 'sinks', [prometheus, statsd])
+
+    for _ in range(2):
+        response = client.post('/graphql', {"query": IMAGES_QUERY})
+        assert 'extensions' not in response.json()
+
+    metrics = metrics_view(None).content.decode()
+    assert 'wagtail_graphql_requests_total 2\n' in metrics
+    assert 'wagtail_graphql_resolver_calls_total{path="images.url"} 4\n' in metrics
+
+    lines = receiver.recv(65536).decode().split('\n')
+    receiver.close()
+    assert 'api.resolver.images.url.calls:2|c' in lines
+    assert [line for line in lines if line.startswith('api.request.time:')]
+
+
+@pytest.mark.django_db
+def test_timing_sample_rate(client, monkeypatch):
+    from wagtail_graphql.timing import PrometheusSink, resolver_timing
+    prometheus = PrometheusSink()
+    monkeypatch.setattr(resolver_timing, 'sinks', [prometheus])
+    monkeypatch.setattr(resolver_timing, 'sample_rate', 0.0)
+    client.post('/graphql', {"query": IMAGES_QUERY})
+    assert prometheus.requests == 0
@@ -1,2 +1,3 @@
-
 __version__ = '0.2.0'
+
+default_app_config = 'wagtail_graphql.apps.ApiConfig'
@@ -1,6 +1,6 @@
 # python
 import string
-from typing import Type, Set
+from typing import List, Optional, Set, Tuple, Type
 # django
 from django.utils.text import camel_case_to_spaces
 # graphene
@@ -16,6 +16,7 @@ from wagtail.contrib.forms.models import AbstractForm
 # wagtail settings
 from wagtail.contrib.settings.models import BaseSetting
 # app
+from .field_cache import cached_field
 from .registry import registry
 from .permissions import with_page_permissions
 from .settings import url_prefix_for_site, RELAY
@@ -36,6 +37,7 @@ def _add_form(cls: Type[AbstractForm], node: str, dict_params: dict) -> Type[gra
     dict_params['Meta'].interfaces += (Page,)
     dict_params['form_fields'] = graphene.List(FormField)
 
+    @cached_field
     def form_fields(self, _info):
         return list(FormField(name=field_.clean_name, field_type=field_.field_type,
                               label=field_.label, required=field_.required,
@@ -178,41 +180,48 @@ def _register_model(registered: Set[type], cls: type, snippet: bool,
 
 
 def add_app(app: str, prefix: str = '{app}') -> None:
-    from django.contrib.contenttypes.models import ContentType
+    from django.apps import apps
     from wagtail.snippets.models import get_snippet_models
-    snippets = get_snippet_models()
-    models = [mdl.model_class()
-              for mdl in ContentType.objects.filter(app_label=app).all()]
-    snippets = [s for s in snippets if s in models]
-    to_register = [x for x in snippets + models if x is not None]
+    try:
+        models = list(apps.get_app_config(app).get_models())
+    except LookupError:
+        import logging
+        logging.warning("App %s isn't installed", app)
+        return
+    snippets = [s for s in get_snippet_models() if s in models]
+    to_register = snippets + [m for m in models if m not in snippets]
     registered: Set = set()
 
-    # prefetch content_types
-    ContentType.objects.get_for_models(*to_register)
-
     for cls in to_register:
         _register_model(registered, cls, cls in snippets, app, prefix)
 
 
-def add_apps_with_settings(settings: dict) -> None:
+def app_prefixes(settings: Optional[dict] = None) -> List[Tuple[str, str]]:
+    """The ``APPS`` to register, with their type name prefix."""
+    if settings is None:
+        from .settings import SETTINGS
+        settings = SETTINGS
     apps = settings.get('APPS', [])
-
-    for app in apps:
-        prefixes = settings.get('PREFIX', {})
-        if isinstance(prefixes, str):
-            prefix = prefixes   # pragma: no cover
-        else:
-            prefix = prefixes.get(app, '{app}')
-        add_app(app, prefix=prefix)
     if not apps:   # pragma: no cover
         import logging
         logging.warning("No APPS specified for wagtail_graphql")
 
+    prefixes = settings.get('PREFIX', {})
+    if isinstance(prefixes, str):
+        return [(app, prefixes) for app in apps]   # pragma: no cover
+    return [(app, prefixes.get(app, '{app}')) for app in apps]
+
+
+def add_apps_with_settings(settings: dict) -> None:
+    for app, prefix in app_prefixes(settings):
+        add_app(app, prefix=prefix)
+
 
 def add_apps() -> None:
-    from .settings import SETTINGS
-    add_apps_with_settings(SETTINGS)
+    for app, prefix in app_prefixes():
+        add_app(app, prefix=prefix)
 
 
-# standard page
-_register_model(set(), wagtailPage, False, 'wagtailcore', '', override_name='BasePage')
+def add_base_page() -> None:
+    """Register the standard page."""
+    _register_model(set(), wagtailPage, False, 'wagtailcore', '', override_name='BasePage')
@@ -1,5 +1,24 @@
-from django.apps import AppConfig      # pragma: no cover
+import sys
 
+from django.apps import AppConfig
 
-class ApiConfig(AppConfig):     # pragma: no cover
+
+def _is_serving() -> bool:
+    """Whether the process serves requests rather than running a management command like ``migrate``."""
+    if not sys.argv or not sys.argv[0].endswith(('manage.py', 'django-admin', 'django-admin.py')):
+        return True
+    return sys.argv[1:2] == ['runserver']
+
+
+class ApiConfig(AppConfig):
     name = 'wagtail_graphql'
+
+    def ready(self):
+        from .signals import register_signal_handlers
+        register_signal_handlers()
+
+        from .settings import PREBUILD_SCHEMA
+        if PREBUILD_SCHEMA and _is_serving():
+            # e.g. in the master process of a preforking server, shared by the workers
+            from .schema import get_schema
+            get_schema()
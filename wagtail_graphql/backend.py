@@ -0,0 +1,74 @@
+# python
+import threading
+from collections import OrderedDict, namedtuple
+from functools import partial
+from typing import Any, List, Tuple
+# graphql
+from graphql import GraphQLError, parse, validate
+from graphql.backend.base import GraphQLBackend, GraphQLDocument
+from graphql.backend.core import execute_and_validate
+from graphql.execution import ExecutionResult
+# app
+from .settings import DOCUMENT_CACHE_SIZE
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def compile_document(schema: Any, query: str) -> Tuple[GraphQLDocument, List[GraphQLError]]:
+    """Parse and validate a query once.
+
+    The returned document executes without validating again, or returns the validation errors.
+    """
+    document_ast = parse(query)
+    errors = validate(schema, document_ast)
+    if errors:
+        def execute(*args, **kwargs):
+            return ExecutionResult(errors=errors, invalid=True)
+    else:
+        execute = partial(execute_and_validate, schema, document_ast, validate=False)
+    return GraphQLDocument(schema, query, document_ast, execute), errors
+
+
+class DocumentCacheBackend(GraphQLBackend):
+    """Backend keeping the parsed and validated documents of the most recent queries.
+
+    Documents are kept for up to ``maxsize`` query strings, evicting the least recently used;
+    queries that fail to parse aren't cached.
+    """
+
+    def __init__(self, maxsize: int = DOCUMENT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._documents: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def document_from_string(self, schema: Any, document_string: str) -> GraphQLDocument:
+        key = (schema, document_string)
+        with self._lock:
+            document = self._documents.get(key)
+            if document is not None:
+                self._documents.move_to_end(key)
+                self.hits += 1
+                return document
+            self.misses += 1
+
+        document, _ = compile_document(schema, document_string)
+        if self.maxsize > 0:
+            with self._lock:
+                self._documents[key] = document
+                while len(self._documents) > self.maxsize:
+                    self._documents.popitem(last=False)
+        return document
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._documents))
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self.hits = self.misses = 0
+
+
+document_cache = DocumentCacheBackend()
@@ -0,0 +1,156 @@
+# python
+from typing import Any, Dict, List, Optional, Set, Tuple
+# graphql
+from graphql import GraphQLError, GraphQLList, GraphQLNonNull, get_named_type, is_composite_type
+from graphql.language.ast import (
+    Document, Field, FragmentDefinition, FragmentSpread, IntValue, OperationDefinition, SelectionSet, Variable,
+)
+# app
+from .settings import QUERY_COST
+
+# arguments giving the number of items of a list
+SIZE_ARGUMENTS = ('first', 'last', 'limit')
+
+
+class QueryCostError(GraphQLError):
+    def __init__(self, message: str) -> None:
+        super().__init__(message, extensions={'code': 'QUERY_TOO_COMPLEX'})
+
+
+class QueryCost:
+    """Static cost and depth of a query, worked out before executing it.
+
+    Every object a query selects costs 1 and lists multiply the cost of their items by their size:
+    the ``first``, ``last`` or ``limit`` argument when given, the estimate of the field in
+    ``list_sizes``, given as ``'Type.field'``, or ``default_list_size``.  Fragments on the types of
+    an interface or union only count the most expensive one.  Queries over ``max_cost`` or deeper
+    than ``max_depth`` fields are rejected.
+    """
+    DEFAULT_LIST_SIZES = {
+        'Query.pages': 100,
+        'Query.images': 100,
+        'Query.documents': 100,
+        'Query.snippets': 100,
+        'Query.showInMenus': 20,
+    }
+
+    def __init__(self, max_cost: Optional[int] = None, max_depth: Optional[int] = None,
+                 list_sizes: Optional[Dict[str, int]] = None, default_list_size: int = 10) -> None:
+        self.max_cost = max_cost
+        self.max_depth = max_depth
+        self.list_sizes = dict(self.DEFAULT_LIST_SIZES, **(list_sizes or {}))
+        self.default_list_size = default_list_size
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_cost is not None or self.max_depth is not None
+
+    def analyze(self, schema: Any, document: Document, operation_name: Optional[str] = None,
+                variables: Optional[Dict[str, Any]] = None) -> Tuple[int, int]:
+        """The cost and depth of an operation, ``(0, 0)`` when it isn't in the document."""
+        operations = [d for d in document.definitions if isinstance(d, OperationDefinition)]
+        operation = next((o for o in operations if operation_name is None or
+                          (o.name and o.name.value == operation_name)), None)
+        if operation is None:
+            return 0, 0
+        root = schema.get_mutation_type() if operation.operation == 'mutation' else schema.get_query_type()
+        if root is None:
+            return 0, 0
+        analysis = _Analysis(self, schema, document, variables or {})
+        return analysis.selection_cost(operation.selection_set, root, set())
+
+    def check(self, cost: int, depth: int) -> None:
+        if self.max_depth is not None and depth > self.max_depth:
+            raise QueryCostError('Query depth %d exceeds the limit of %d' % (depth, self.max_depth))
+        if self.max_cost is not None and cost > self.max_cost:
+            raise QueryCostError('Query cost %d exceeds the budget of %d' % (cost, self.max_cost))
+
+    def extensions(self, cost: int, depth: int) -> Dict[str, Any]:
+        return {'cost': {'requested': cost, 'depth': depth, 'budget': self.max_cost, 'maxDepth': self.max_depth}}
+
+
+def _is_connection(type_: Any) -> bool:
+    fields = getattr(type_, 'fields', None) or {}
+    return 'edges' in fields and 'pageInfo' in fields
+
+
+class _Analysis:
+    def __init__(self, query_cost: QueryCost, schema: Any, document: Document, variables: Dict[str, Any]) -> None:
+        self.query_cost = query_cost
+        self.schema = schema
+        self.variables = variables
+        self.fragments = dict((d.name.value, d) for d in document.definitions if isinstance(d, FragmentDefinition))
+
+    def collect(self, selection_set: SelectionSet, condition: Optional[str], visited: Set[str],
+                fields: Dict[Optional[str], List[Tuple[Field, Set[str]]]]) -> None:
+        """Group the fields of a selection by the type condition of their fragment, with the fragments
+        spread to reach them."""
+        for selection in selection_set.selections:
+            if isinstance(selection, Field):
+                fields.setdefault(condition, []).append((selection, visited))
+                continue
+            if isinstance(selection, FragmentSpread):
+                name = selection.name.value
+                if name in visited or name not in self.fragments:
+                    continue
+                visited = visited | {name}
+                selection = self.fragments[name]
+            type_condition = selection.type_condition.name.value if selection.type_condition else condition
+            self.collect(selection.selection_set, type_condition, visited, fields)
+
+    def selection_cost(self, selection_set: SelectionSet, parent: Any, visited: Set[str]) -> Tuple[int, int]:
+        fields: Dict[Optional[str], List[Tuple[Field, Set[str]]]] = {}
+        self.collect(selection_set, None, visited, fields)
+        if parent.name in fields:
+            fields.setdefault(None, []).extend(fields.pop(parent.name))
+
+        costs: Dict[Optional[str], int] = {}
+        depth = 0
+        for condition, group in fields.items():
+            type_ = parent if condition is None else (self.schema.get_type(condition) or parent)
+            for field, field_visited in group:
+                cost, field_depth = self.field_cost(field, type_, field_visited)
+                costs[condition] = costs.get(condition, 0) + cost
+                depth = max(depth, field_depth)
+        common = costs.pop(None, 0)
+        return common + max(costs.values(), default=0), depth
+
+    def field_cost(self, field: Field, parent: Any, visited: Set[str]) -> Tuple[int, int]:
+        name = field.name.value
+        field_def = (getattr(parent, 'fields', None) or {}).get(name)
+        if field_def is None or name.startswith('__'):
+            return 0, 1
+        field_type = field_def.type
+        if isinstance(field_type, GraphQLNonNull):
+            field_type = field_type.of_type
+        named_type = get_named_type(field_type)
+        if not is_composite_type(named_type) or field.selection_set is None:
+            return 0, 1
+
+        size = 1
+        # the size of a connection is counted on the connection, not on its edges
+        if _is_connection(named_type) or (isinstance(field_type, GraphQLList) and not _is_connection(parent)):
+            size = self.list_size(field, '%s.%s' % (parent.name, name))
+        cost, depth = self.selection_cost(field.selection_set, named_type, visited)
+        return size * (1 + cost), depth + 1
+
+    def list_size(self, field: Field, key: str) -> int:
+        for argument in field.arguments or ():
+            if argument.name.value not in SIZE_ARGUMENTS:
+                continue
+            value: Any = argument.value
+            if isinstance(value, Variable):
+                value = self.variables.get(value.name.value)
+            elif isinstance(value, IntValue):
+                value = int(value.value)
+            if isinstance(value, int):
+                return value
+        return self.query_cost.list_sizes.get(key, self.query_cost.default_list_size)
+
+
+query_cost = QueryCost(
+    max_cost=QUERY_COST.get('MAX_COST'),
+    max_depth=QUERY_COST.get('MAX_DEPTH'),
+    list_sizes=QUERY_COST.get('LIST_SIZES'),
+    default_list_size=QUERY_COST.get('DEFAULT_LIST_SIZE', 10),
+)
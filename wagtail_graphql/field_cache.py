@@ -0,0 +1,178 @@
+# python
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from functools import partial, wraps
+from time import monotonic
+from typing import Any, Callable, Dict, Optional, Set
+# django
+from django.core.cache import caches
+from django.db import models
+# graphql
+from graphql import ResolveInfo
+# promise
+from promise import Promise, is_thenable
+# app
+from .backend import CacheInfo
+from .settings import FIELD_CACHE
+
+_MISSING = object()
+
+
+def _store(store: Callable[[Any], None], value: Any, cache_if: Optional[Callable[[Any], bool]]) -> Any:
+    if is_thenable(value):
+        return Promise.resolve(value).then(partial(_store, store, cache_if=cache_if))
+    if cache_if is None or cache_if(value):
+        store(value)
+    return value
+
+
+def _base_label(model: Any) -> str:
+    """The label of the root of a multi-table inheritance chain, e.g. ``wagtailcore.page``."""
+    parents = [parent for parent in model._meta.get_parent_list() if not parent._meta.parents]
+    return (parents[0] if parents else model)._meta.label_lower
+
+
+class FieldCache:
+    """Memoize fields derived from a model row and the field arguments.
+
+    Values are keyed on the field, the object and the arguments, and expire after ``timeout``
+    seconds.  Saving an object drops its values.  Values are kept in a process-local LRU of
+    ``maxsize`` entries or, when ``cache_alias`` names one of the Django ``CACHES``, in that cache
+    where saving an object bumps its version.
+    """
+    key_prefix = 'wagtail_graphql:fields'
+
+    def __init__(self, maxsize: int = 1024, cache_alias: Optional[str] = None, timeout: Optional[int] = None) -> None:
+        self.maxsize = maxsize
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.labels: Set[str] = set()
+        self._values: OrderedDict = OrderedDict()
+        self._objects: Dict[tuple, Set[tuple]] = {}
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def _get_local(self, key: tuple) -> Any:
+        with self._lock:
+            expires, value = self._values.get(key, (None, _MISSING))
+            if value is not _MISSING and expires is not None and expires <= monotonic():
+                self._pop_local(key)
+                value = _MISSING
+            if value is _MISSING:
+                self.misses += 1
+                return value
+            self._values.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _set_local(self, key: tuple, invalidations: int, value: Any) -> None:
+        with self._lock:
+            if invalidations != self._invalidations:
+                # an object was saved while resolving
+                return
+            expires = monotonic() + self.timeout if self.timeout is not None else None
+            self._values[key] = (expires, value)
+            self._objects.setdefault(key[1:3], set()).add(key)
+            while len(self._values) > self.maxsize:
+                self._pop_local(next(iter(self._values)))
+
+    def _pop_local(self, key: tuple) -> None:
+        del self._values[key]
+        keys = self._objects[key[1:3]]
+        keys.discard(key)
+        if not keys:
+            del self._objects[key[1:3]]
+
+    def _version_key(self, label: str, pk: Any) -> str:
+        return '%s:version:%s:%s' % (self.key_prefix, label, pk)
+
+    def get_or_resolve(self, name: str, instance: models.Model, args: tuple, resolve: Callable[[], Any],
+                       cache_if: Callable[[Any], bool] = None) -> Any:
+        """The cached value of a field, resolving and storing it when missing.
+
+        Promises are stored once they resolve, values are only stored when ``cache_if`` allows it.
+        """
+        label = _base_label(type(instance))
+        self.labels.add(label)
+        if not self.cache_alias:
+            key = (name, label, instance.pk, args)
+            value = self._get_local(key)
+            if value is not _MISSING:
+                return value
+            return _store(partial(self._set_local, key, self._invalidations), resolve(), cache_if)
+
+        cache = caches[self.cache_alias]
+        version_key = self._version_key(label, instance.pk)
+        cache_key = '%s:%s:%s:%s:%s' % (self.key_prefix, name, label, instance.pk,
+                                        hashlib.md5(repr(args).encode()).hexdigest())
+        found = cache.get_many([cache_key, version_key])
+        version = found.get(version_key)
+        if cache_key in found and found[cache_key][0] == version:
+            self._count(hit=True)
+            return found[cache_key][1]
+        self._count(hit=False)
+        return _store(lambda value: cache.set(cache_key, (version, value), self.timeout), resolve(), cache_if)
+
+    def invalidate(self, model: Any, pk: Any) -> None:
+        label = _base_label(model)
+        if label not in self.labels and not self.cache_alias:
+            return
+        with self._lock:
+            self._invalidations += 1
+            for key in self._objects.pop((label, pk), ()):
+                del self._values[key]
+        if self.cache_alias:
+            caches[self.cache_alias].set(self._version_key(label, pk), uuid.uuid4().hex, None)
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._values))
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._objects.clear()
+            self.hits = self.misses = 0
+
+
+field_cache = FieldCache(
+    FIELD_CACHE.get('SIZE', 1024),
+    FIELD_CACHE.get('CACHE'),
+    FIELD_CACHE.get('TIMEOUT'),
+)
+
+
+def cached_field(resolver: Callable = None, vary_on_site: bool = False,
+                 cache_if: Callable[[Any], bool] = None) -> Any:
+    """Decorate the resolver of a field that only depends on its object and arguments.
+
+    Use ``vary_on_site`` for fields that also depend on the site of the request and ``cache_if``
+    to only cache some values.  Unsaved objects and previews, objects with a true ``is_preview``,
+    are never cached and page revisions are keyed on the revision.
+    """
+    def decorator(resolver: Callable) -> Callable:
+        name = resolver.__qualname__
+
+        @wraps(resolver)
+        def wrapper(self, info: ResolveInfo, **kwargs):
+            if not self.pk or getattr(self, 'is_preview', False):
+                return resolver(self, info, **kwargs)
+            args: tuple = (getattr(self, 'revision', None),) + tuple(sorted(kwargs.items()))
+            if vary_on_site:
+                site = getattr(info.context, 'site', None)
+                args += (site.pk if site else None,)
+            return field_cache.get_or_resolve(name, self, args, lambda: resolver(self, info, **kwargs), cache_if)
+        return wrapper
+
+    return decorator(resolver) if resolver is not None else decorator
@@ -0,0 +1,109 @@
+# python
+from datetime import datetime
+from typing import Any, Dict, Optional
+# django
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import Subquery
+# graphene
+import graphene
+# wagtail
+from wagtail.core.models import Page as wagtailPage
+# app
+from .settings import MAX_PAGE_SIZE
+
+
+def list_arguments() -> Dict[str, Any]:
+    """Arguments paginating a list: ``after`` is the id of the last object of the previous page."""
+    return dict(limit=graphene.Int(), offset=graphene.Int(), after=graphene.Int())
+
+
+def page_filters() -> Dict[str, Any]:
+    return dict(
+        content_type=graphene.String(),
+        min_depth=graphene.Int(),
+        max_depth=graphene.Int(),
+        published_after=graphene.DateTime(),
+        published_before=graphene.DateTime(),
+    )
+
+
+def collection_filters() -> Dict[str, Any]:
+    return dict(
+        collection=graphene.Int(),
+        tag=graphene.String(),
+        created_after=graphene.DateTime(),
+        created_before=graphene.DateTime(),
+    )
+
+
+def max_page_size(name: str) -> Optional[int]:
+    """The largest page of a list, set for all lists or per list name in ``MAX_PAGE_SIZE``."""
+    if isinstance(MAX_PAGE_SIZE, dict):
+        return MAX_PAGE_SIZE.get(name, MAX_PAGE_SIZE.get('default'))
+    return MAX_PAGE_SIZE
+
+
+def filter_pages(queryset: models.QuerySet, content_type: str = None, min_depth: int = None,
+                 max_depth: int = None, published_after: datetime = None, published_before: datetime = None,
+                 **_kwargs) -> models.QuerySet:
+    if content_type is not None:
+        app_label, _, model = content_type.partition('.')
+        try:
+            content_type_id = ContentType.objects.get_by_natural_key(app_label, model.lower()).id
+        except ContentType.DoesNotExist:
+            raise ValueError("Content type '%s' doesn't exist" % content_type)
+        queryset = queryset.filter(content_type_id=content_type_id)
+    if min_depth is not None:
+        queryset = queryset.filter(depth__gte=min_depth)
+    if max_depth is not None:
+        queryset = queryset.filter(depth__lte=max_depth)
+    if published_after is not None:
+        queryset = queryset.filter(first_published_at__gte=published_after)
+    if published_before is not None:
+        queryset = queryset.filter(first_published_at__lt=published_before)
+    return queryset
+
+
+def filter_collection_items(queryset: models.QuerySet, collection: int = None, tag: str = None,
+                            created_after: datetime = None, created_before: datetime = None,
+                            **_kwargs) -> models.QuerySet:
+    """Filter images or documents."""
+    if collection is not None:
+        queryset = queryset.filter(collection_id=collection)
+    if tag is not None:
+        queryset = queryset.filter(tags__name=tag)
+    if created_after is not None:
+        queryset = queryset.filter(created_at__gte=created_after)
+    if created_before is not None:
+        queryset = queryset.filter(created_at__lt=created_before)
+    return queryset
+
+
+def paginate(queryset: models.QuerySet, name: str, limit: int = None, offset: int = None, after: int = None,
+             **_kwargs) -> models.QuerySet:
+    """Slice a list, capped to its ``max_page_size``.
+
+    Pages stay ordered by path and ``after`` a page is the pages after it in the tree.  Other
+    objects are ordered by primary key with ``after``, otherwise their ordering is kept with the
+    primary key as a tiebreaker.
+    """
+    for argument, value in (('limit', limit), ('offset', offset)):
+        if value is not None and value < 0:
+            raise ValueError("Argument '%s' must be a non-negative integer" % argument)
+
+    if issubclass(queryset.model, wagtailPage):
+        if after is not None:
+            queryset = queryset.filter(path__gt=Subquery(wagtailPage.objects.filter(id=after).values('path')[:1]))
+    elif after is not None:
+        queryset = queryset.order_by('pk').filter(pk__gt=after)
+    elif queryset.ordered:
+        queryset = queryset.order_by(*(queryset.query.order_by or queryset.model._meta.ordering), 'pk')
+
+    maximum = max_page_size(name)
+    if maximum is not None:
+        limit = maximum if limit is None else min(limit, maximum)
+    offset = offset or 0
+    if limit is not None:
+        return queryset[offset:offset + limit]
+    return queryset[offset:] if offset else queryset
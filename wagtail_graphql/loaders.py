@@ -0,0 +1,172 @@
+# python
+from typing import Any, Iterable, List, Optional, Tuple, Type
+# django
+from django.db import models
+from django.db.models import Q
+# graphql
+from graphql import ResolveInfo
+# promise
+from promise import Promise
+from promise.dataloader import DataLoader
+# wagtail
+from wagtail.core.models import Page as wagtailPage
+from wagtail.images.models import Filter
+# app
+from .renditions import rendition_pool
+from .settings import MISSING_RENDITIONS
+
+
+class ModelLoader(DataLoader):
+    """Batch load model instances by primary key with a single ``id__in`` query."""
+
+    def __init__(self, model: Type[models.Model], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.model = model
+
+    def get_queryset(self, keys: List[Any]) -> models.QuerySet:
+        return self.model.objects.filter(id__in=keys)
+
+    def batch_load_fn(self, keys: List[Any]) -> Promise:
+        objects = dict((obj.pk, obj) for obj in self.get_queryset(keys))
+        return Promise.resolve([objects.get(key) for key in keys])
+
+
+class PageLoader(ModelLoader):
+    """Batch load pages as their specific type."""
+
+    def get_queryset(self, keys: List[Any]) -> models.QuerySet:
+        return wagtailPage.objects.filter(id__in=keys).specific()
+
+
+class ChildPages(list):
+    """The children of a page after a cursor, with the number of children in ``total``."""
+
+    def __init__(self, pages: Iterable[Any] = (), total: int = 0) -> None:
+        super().__init__(pages)
+        self.total = total
+
+
+class ChildrenLoader(DataLoader):
+    """Batch load the children of pages, keyed by ``(parent path, after path, limit)``.
+
+    The children of every parent in the batch are fetched with a single path prefix query
+    and ``.specific()`` runs once per content type for the whole batch.  With a limit, only the
+    paths of the children are fetched first and ``.specific()`` loads up to ``limit`` children
+    after the ``after`` path of each parent.
+    """
+
+    def __init__(self, request: Any, plan: Any, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.request = request
+        self.plan = plan
+
+    def batch_load_fn(self, keys: List[Tuple[str, Optional[str], Optional[int]]]) -> Promise:
+        from .permissions import with_page_permissions
+
+        q = Q()
+        for path, _after, _limit in keys:
+            q |= Q(path__startswith=path, depth=len(path) // wagtailPage.steplen + 1)
+        query = with_page_permissions(self.request, wagtailPage.objects.filter(q)).live().order_by('path')
+
+        if all(limit is None for _path, _after, limit in keys):
+            children: dict = dict((key[0], []) for key in keys)
+            for page in self.plan.specific(query):
+                children[page.path[:-wagtailPage.steplen]].append(page)
+            return Promise.resolve([ChildPages(children[path], len(children[path])) for path, _, _ in keys])
+
+        paths: dict = dict((key[0], []) for key in keys)
+        for pk, path in query.values_list('pk', 'path'):
+            paths[path[:-wagtailPage.steplen]].append((path, pk))
+        selected = []
+        for parent, after, limit in keys:
+            rows = [pk for path, pk in paths[parent] if after is None or path > after]
+            selected.append(rows[:limit] if limit is not None else rows)
+        pages = dict(
+            (page.pk, page) for page in
+            self.plan.specific(wagtailPage.objects.filter(pk__in=[pk for pks in selected for pk in pks]))
+        )
+        return Promise.resolve([
+            ChildPages([pages[pk] for pk in pks if pk in pages], len(paths[key[0]])) for key, pks in zip(keys, selected)
+        ])
+
+
+class RenditionLoader(DataLoader):
+    """Batch load image renditions, keyed by ``(image, filter spec)``.
+
+    The existing renditions of every image in the batch are fetched with a single query.  Missing
+    renditions are collected in ``missing`` and generated, unless ``missing_renditions`` is
+    ``'skip'``, ``'defer'`` or ``'background'``, in which case they load as ``None``.  In the
+    background mode they are also submitted to the rendition pool.
+    """
+
+    def __init__(self, missing_renditions: str = 'generate', **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.missing_renditions = missing_renditions
+        self.missing: List[Tuple[Any, str]] = []
+
+    def batch_load_fn(self, keys: List[Tuple[Any, str]]) -> Promise:
+        images = dict((image.pk, image) for image, _ in keys)
+        rendition_model = keys[0][0].get_rendition_model()
+        renditions = dict(
+            ((r.image_id, r.filter_spec, r.focal_point_key), r)
+            for r in rendition_model.objects.filter(image_id__in=list(images),
+                                                    filter_spec__in=set(spec for _, spec in keys))
+        )
+        return Promise.resolve([self._rendition(renditions, image, spec) for image, spec in keys])
+
+    def _rendition(self, renditions: dict, image: Any, spec: str) -> Any:
+        try:
+            filter_ = Filter(spec=spec)
+            rendition = renditions.get((image.pk, filter_.spec, filter_.get_cache_key(image)))
+            if rendition is None:
+                self.missing.append((image, spec))
+                if self.missing_renditions == 'generate':
+                    rendition = image.get_rendition(filter_)
+                elif self.missing_renditions == 'background':
+                    rendition_pool.submit(image.pk, filter_.spec)
+            return rendition
+        except Exception as e:
+            return e
+
+
+def request_cache(context: Any) -> dict:
+    """Return a dictionary that lives as long as the current request."""
+    cache = getattr(context, '_wagtail_graphql_cache', None)
+    if cache is None:
+        cache = {}
+        setattr(context, '_wagtail_graphql_cache', cache)
+    return cache
+
+
+def get_loader(info: ResolveInfo, model: type) -> DataLoader:
+    loaders = request_cache(info.context).setdefault('loaders', {})
+    loader = loaders.get(model)
+    if loader is None:
+        loader_cls = PageLoader if issubclass(model, wagtailPage) else ModelLoader
+        loader = loaders[model] = loader_cls(model)
+    return loader
+
+
+def children_loader(info: ResolveInfo, plan: Any) -> ChildrenLoader:
+    """The children loader for a query plan, one per plan and request."""
+    loaders = request_cache(info.context).setdefault('children_loaders', {})
+    if plan not in loaders:
+        loaders[plan] = ChildrenLoader(info.context, plan)
+    return loaders[plan]
+
+
+def rendition_loader(info: ResolveInfo) -> RenditionLoader:
+    cache = request_cache(info.context)
+    if 'rendition_loader' not in cache:
+        cache['rendition_loader'] = RenditionLoader(MISSING_RENDITIONS)
+    return cache['rendition_loader']
+
+
+def load(info: ResolveInfo, model: type, id_: Any) -> Any:
+    if id_ is None:
+        return None
+    return get_loader(info, model).load(id_)
+
+
+def load_many(info: ResolveInfo, model: type, ids: Iterable[Any]) -> List[Any]:
+    return [load(info, model, id_) for id_ in ids]
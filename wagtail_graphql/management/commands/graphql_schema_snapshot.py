@@ -0,0 +1,31 @@
+# django
+from django.core.management.base import BaseCommand, CommandError
+# app
+from wagtail_graphql.schema import get_schema
+from wagtail_graphql.settings import SCHEMA_SNAPSHOT
+from wagtail_graphql.snapshot import snapshot_is_current, write_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Build the GraphQL schema and write its type graph and model signature to a snapshot file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=SCHEMA_SNAPSHOT.get('PATH'))
+        parser.add_argument('--check', action='store_true',
+                            help="exit with an error if the snapshot doesn't match the models, without writing it")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not path:
+            raise CommandError("No snapshot path given and SCHEMA_SNAPSHOT['PATH'] isn't set")
+
+        if options['check']:
+            if not snapshot_is_current(path):
+                raise CommandError('%s is out of date' % path)
+            self.stdout.write('%s is up to date' % path)
+            return
+
+        data = write_snapshot(path, get_schema())
+        self.stdout.write('%s  %s (%d types, built in %.1fms)' % (
+            data['signature'], path, sum(len(v) for v in data['types'].values()),
+            data['timings'].get('total', 0) * 1000))
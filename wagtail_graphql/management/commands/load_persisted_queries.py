@@ -0,0 +1,45 @@
+# python
+import json
+import os
+# django
+from django.core.management.base import BaseCommand, CommandError
+# graphql
+from graphql import GraphQLError
+# graphene_django
+from graphene_django.settings import graphene_settings
+# app
+from wagtail_graphql.backend import compile_document
+from wagtail_graphql.persisted import persisted_queries
+
+
+class Command(BaseCommand):
+    help = 'Validate the .graphql files in a directory and register them as persisted queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--manifest', help='write a JSON file mapping each file name to its hash')
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError('%s is not a directory' % directory)
+
+        hashes = {}
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.graphql'):
+                continue
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                query = f.read()
+            try:
+                _, errors = compile_document(graphene_settings.SCHEMA, query)
+            except GraphQLError as e:
+                errors = [e]
+            if errors:
+                self.stderr.write('%s: %s' % (name, '; '.join(str(e) for e in errors)))
+                continue
+            hashes[name] = persisted_queries.register(query)
+            self.stdout.write('%s  %s' % (hashes[name], name))
+
+        if options['manifest']:
+            with open(options['manifest'], 'w') as f:
+                json.dump(hashes, f, indent=2, sort_keys=True)
@@ -0,0 +1,40 @@
+# python
+from collections import OrderedDict
+from concurrent.futures import wait
+# django
+from django.core.management.base import BaseCommand
+# wagtail
+from wagtail.images import get_image_model
+# app
+from wagtail_graphql.renditions import RenditionPool, missing_renditions
+from wagtail_graphql.settings import RENDITION_WORKERS
+
+
+class Command(BaseCommand):
+    help = 'Generate the missing renditions of every image for the given filter specs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filter_specs', nargs='+', metavar='filter_spec')
+        parser.add_argument('--collection', type=int, help='only warm the images of this collection id')
+        parser.add_argument('--workers', type=int, default=RENDITION_WORKERS,
+                            help='number of threads, 0 generates the renditions in this thread')
+        parser.add_argument('--chunk-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        images = get_image_model().objects.order_by('pk')
+        if options['collection'] is not None:
+            images = images.filter(collection_id=options['collection'])
+
+        pool = RenditionPool(options['workers'])
+        futures = []
+        chunk_size = options['chunk_size']
+        filter_specs = list(OrderedDict.fromkeys(options['filter_specs']))
+        for start in range(0, images.count(), chunk_size):
+            for image, spec in missing_renditions(images[start:start + chunk_size], filter_specs):
+                future = pool.submit(image.pk, spec)
+                if future is not None:  # already pending
+                    futures.append(future)
+        wait(futures)
+
+        failed = sum(1 for future in futures if future.exception() is not None)
+        self.stdout.write('%d renditions generated, %d failed' % (len(futures) - failed, failed))
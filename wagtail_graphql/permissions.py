@@ -1,13 +1,148 @@
 # python
-from typing import Any, Union
+import hashlib
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Tuple, Union
 # django
+from django.core.cache import caches
 from django.db.models import Q
 from django.contrib.auth.models import AnonymousUser
 # wagtail
 from wagtail.core.query import PageQuerySet
-from wagtail.core.models import PageViewRestriction, CollectionViewRestriction
+from wagtail.core.models import BaseViewRestriction, PageViewRestriction, CollectionViewRestriction
 from wagtail.images.models import ImageQuerySet
 from wagtail.documents.models import DocumentQuerySet
+# app
+from .loaders import request_cache
+from .settings import RESTRICTIONS_CACHE, RESTRICTIONS_SIZE, RESTRICTIONS_TIMEOUT
+
+# (path prefixes, collection ids) hidden from a group fingerprint
+RestrictedScope = Tuple[Tuple[str, ...], Tuple[int, ...]]
+
+
+class RestrictionIndex:
+    """Process-wide index of the pages and collections hidden from each group fingerprint.
+
+    Entries are kept in a local LRU of ``maxsize`` entries or, when ``RESTRICTIONS_CACHE`` names
+    one of the Django ``CACHES``, in that cache so that they are shared between processes.  The
+    index is cleared by the signal handlers in :mod:`wagtail_graphql.signals`, which only reach
+    the local entries of the process saving the change, so those expire after ``timeout`` seconds.
+    """
+    key_prefix = 'wagtail_graphql:restrictions'
+
+    def __init__(self, cache_alias: str = None, maxsize: int = 1024, timeout: float = 5) -> None:
+        self.cache_alias = cache_alias
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._local: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def _version_key(self) -> str:
+        return self.key_prefix + ':version'
+
+    def _get(self, name: str, build: Callable[[], Any]) -> Any:
+        if not self.cache_alias:
+            now = monotonic()
+            with self._lock:
+                expires, value = self._local.get(name, (0, None))
+                if expires > now:
+                    self._local.move_to_end(name)
+                    return value
+            value = build()
+            with self._lock:
+                self._local[name] = (now + self.timeout, value)
+                self._local.move_to_end(name)
+                while len(self._local) > self.maxsize:
+                    self._local.popitem(last=False)
+            return value
+
+        cache = caches[self.cache_alias]
+        version = cache.get_or_set(self._version_key, 1, None)
+        key = '%s:%s' % (self.key_prefix, name)
+        value = cache.get(key, version=version)
+        if value is None:
+            value = build()
+            cache.set(key, value, None, version=version)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+        if self.cache_alias:
+            cache = caches[self.cache_alias]
+            try:
+                cache.incr(self._version_key)
+            except ValueError:
+                cache.set(self._version_key, 1, None)
+
+    def user_groups(self, user: Any) -> frozenset:
+        if not user.is_authenticated:
+            return frozenset()
+        return self._get('groups:%s' % user.pk,
+                         lambda: frozenset(user.groups.values_list('id', flat=True)))
+
+    def restrictions(self) -> Tuple[list, list]:
+        def build():
+            pages = [(r.restriction_type, frozenset(g.id for g in r.groups.all()), r.page.path)
+                     for r in PageViewRestriction.objects.select_related('page').prefetch_related('groups')]
+            collections = [(r.restriction_type, frozenset(g.id for g in r.groups.all()), r.collection_id)
+                           for r in CollectionViewRestriction.objects.prefetch_related('groups')]
+            return pages, collections
+        return self._get('all', build)
+
+    def restricted(self, is_authenticated: bool, groups: frozenset) -> RestrictedScope:
+        fingerprint = hashlib.md5(('%d:%s' % (
+            is_authenticated, ','.join(str(g) for g in sorted(groups))
+        )).encode()).hexdigest()
+
+        def build():
+            pages, collections = self.restrictions()
+            return (
+                tuple(path for restriction_type, restriction_groups, path in pages
+                      if _is_restricted(restriction_type, restriction_groups, is_authenticated, groups)),
+                tuple(collection for restriction_type, restriction_groups, collection in collections
+                      if _is_restricted(restriction_type, restriction_groups, is_authenticated, groups)),
+            )
+        return self._get('scope:' + fingerprint, build)
+
+
+def _is_restricted(restriction_type: str, restriction_groups: frozenset,
+                   is_authenticated: bool, groups: frozenset) -> bool:
+    return (restriction_type == BaseViewRestriction.PASSWORD) or \
+        (restriction_type == BaseViewRestriction.LOGIN and not is_authenticated) or \
+        (restriction_type == BaseViewRestriction.GROUPS and not (groups & restriction_groups))
+
+
+restriction_index = RestrictionIndex(RESTRICTIONS_CACHE, RESTRICTIONS_SIZE, RESTRICTIONS_TIMEOUT)
+
+
+def restricted_scope(request: Any) -> RestrictedScope:
+    """The scope hidden from the request user, looked up once per request."""
+    cache = request_cache(request)
+    if 'restricted_scope' not in cache:
+        user = request.user
+        cache['restricted_scope'] = restriction_index.restricted(user.is_authenticated,
+                                                                 restriction_index.user_groups(user))
+    return cache['restricted_scope']
+
+
+def permission_fingerprint(request: Any) -> str:
+    """A digest of what the request user is allowed to see."""
+    if request.user.is_superuser:
+        return 'superuser'
+    return hashlib.md5(repr(restricted_scope(request)).encode()).hexdigest()
+
+
+def page_restrictions_q(request: Any) -> Q:
+    cache = request_cache(request)
+    if 'page_restrictions_q' not in cache:
+        q = Q()
+        for path in restricted_scope(request)[0]:
+            q &= ~Q(path__startswith=path)
+        cache['page_restrictions_q'] = q
+    return cache['page_restrictions_q']
 
 
 def with_page_permissions(request: Any, queryset: PageQuerySet) -> PageQuerySet:
@@ -26,16 +161,7 @@ def with_page_permissions(request: Any, queryset: PageQuerySet) -> PageQuerySet:
     elif user.is_superuser:
         pass
     else:
-        current_user_groups = user.groups.all()
-        q = Q()
-        for restriction in PageViewRestriction.objects.all():
-            if (restriction.restriction_type == PageViewRestriction.PASSWORD) or \
-                    (restriction.restriction_type == PageViewRestriction.LOGIN and not user.is_authenticated) or \
-                    (restriction.restriction_type == PageViewRestriction.GROUPS and
-                     not any(group in current_user_groups for group in restriction.groups.all())
-                     ):
-                q = ~queryset.descendant_of_q(restriction.page, inclusive=True)
-        queryset = queryset.filter(q).live()
+        queryset = queryset.filter(page_restrictions_q(request)).live()
 
     return queryset
 
@@ -52,16 +178,8 @@ def with_collection_permissions(request: Any, queryset: CollectionQSType) -> Col
     elif user.is_superuser:
         pass
     else:
-        current_user_groups = user.groups.all()
-        q = Q()
-        for restriction in CollectionViewRestriction.objects.all():
-            if (restriction.restriction_type == CollectionViewRestriction.PASSWORD) or \
-                    (restriction.restriction_type == CollectionViewRestriction.LOGIN and not user.is_authenticated) or \
-                    (restriction.restriction_type == CollectionViewRestriction.GROUPS and
-                     not any(group in current_user_groups for group in restriction.groups.all())
-                     ):
-                q &= ~Q(collection=restriction.collection)
-                # q &= ~queryset.filter(collection) descendant_of_q(restriction.page, inclusive=True)
-        queryset = queryset.filter(q)
+        collections = restricted_scope(request)[1]
+        if collections:
+            queryset = queryset.exclude(collection__in=collections)
 
     return queryset
@@ -0,0 +1,181 @@
+# python
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+# django
+from django.core.cache import caches
+# graphql
+from graphql import GraphQLError
+from graphql.backend.base import GraphQLBackend, GraphQLDocument
+# app
+from .backend import compile_document
+from .settings import PERSISTED_QUERIES
+
+HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class PersistedQueryError(GraphQLError):
+    """Errors of the automatic persisted queries protocol, reported with an ``extensions.code``."""
+    code = 'PERSISTED_QUERY_ERROR'
+    invalid = True
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message, extensions={'code': self.code})
+
+
+class PersistedQueryNotFound(PersistedQueryError):
+    code = 'PERSISTED_QUERY_NOT_FOUND'
+    invalid = False
+
+    def __init__(self) -> None:
+        super().__init__('PersistedQueryNotFound')
+
+
+class PersistedQueryNotSupported(PersistedQueryError):
+    code = 'PERSISTED_QUERY_NOT_SUPPORTED'
+    invalid = False
+
+    def __init__(self) -> None:
+        super().__init__('PersistedQueryNotSupported')
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+class CacheQueryStore:
+    """Store persisted queries in one of the Django ``CACHES``, e.g. a database cache."""
+    key_prefix = 'wagtail_graphql:persisted'
+
+    def __init__(self, cache_alias: str = 'default') -> None:
+        self.cache_alias = cache_alias
+
+    def get(self, hash_: str) -> Optional[str]:
+        return caches[self.cache_alias].get('%s:%s' % (self.key_prefix, hash_))
+
+    def set(self, hash_: str, query: str) -> None:
+        caches[self.cache_alias].set('%s:%s' % (self.key_prefix, hash_), query, None)
+
+
+class DirectoryQueryStore:
+    """Store persisted queries as ``<sha256>.graphql`` files in a directory."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def path(self, hash_: str) -> str:
+        return os.path.join(self.directory, hash_ + '.graphql')
+
+    def get(self, hash_: str) -> Optional[str]:
+        try:
+            with open(self.path(hash_), encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, hash_: str, query: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(hash_), 'w', encoding='utf-8') as f:
+            f.write(query)
+
+
+class PersistedQueryRegistry:
+    """Queries keyed by the sha256 of their text, with their parsed and validated documents.
+
+    Follows the automatic persisted queries protocol: clients send the hash alone and, when it isn't
+    known, the hash together with the query to register it.  Queries registered that way are only
+    kept in this process, the store only holds the queries loaded with the ``load_persisted_queries``
+    command, and with ``automatic`` off only those are accepted.  Up to ``maxsize`` queries and
+    documents are kept in memory, evicting the least recently used.
+    """
+
+    def __init__(self, store: Any, automatic: bool = True, maxsize: int = 1024) -> None:
+        self.store = store
+        self.automatic = automatic
+        self.maxsize = maxsize
+        self._queries: OrderedDict = OrderedDict()
+        self._documents: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lru_get(self, lru: OrderedDict, key: Any) -> Any:
+        with self._lock:
+            value = lru.get(key)
+            if value is not None:
+                lru.move_to_end(key)
+            return value
+
+    def _lru_set(self, lru: OrderedDict, key: Any, value: Any) -> None:
+        with self._lock:
+            lru[key] = value
+            lru.move_to_end(key)
+            while len(lru) > self.maxsize:
+                lru.popitem(last=False)
+
+    def get(self, hash_: str) -> Optional[str]:
+        query = self._lru_get(self._queries, hash_)
+        if query is None and HASH_RE.match(hash_):
+            query = self.store.get(hash_)
+            if query is not None:
+                self._lru_set(self._queries, hash_, query)
+        return query
+
+    def register(self, query: str) -> str:
+        """Persist a query in the store."""
+        hash_ = query_hash(query)
+        self.store.set(hash_, query)
+        self._lru_set(self._queries, hash_, query)
+        return hash_
+
+    def query(self, hash_: str, query: Optional[str] = None) -> str:
+        """The query text for a request carrying a persisted query hash."""
+        if not query:
+            query = self.get(hash_)
+            if query is None:
+                raise PersistedQueryNotFound()
+            return query
+        if query_hash(query) != hash_:
+            raise PersistedQueryError('provided sha does not match query')
+        if not self.automatic and self.get(hash_) is None:
+            raise PersistedQueryNotSupported()
+        return query
+
+    def document(self, schema: Any, hash_: str, query: str) -> GraphQLDocument:
+        """The precompiled document of a query, registering it once it validates."""
+        key = (schema, hash_)
+        document = self._lru_get(self._documents, key)
+        if document is None:
+            document, errors = compile_document(schema, query)
+            if errors:
+                return document
+            if self.get(hash_) is None:
+                # automatic registrations never reach the store
+                self._lru_set(self._queries, hash_, query)
+            self._lru_set(self._documents, key, document)
+        return document
+
+
+class PersistedQueryBackend(GraphQLBackend):
+    """Backend returning the precompiled document of one persisted query."""
+
+    def __init__(self, registry: PersistedQueryRegistry, hash_: str) -> None:
+        self.registry = registry
+        self.hash = hash_
+
+    def document_from_string(self, schema: Any, document_string: str) -> GraphQLDocument:
+        return self.registry.document(schema, self.hash, document_string)
+
+
+def _store_from_settings() -> Any:
+    if PERSISTED_QUERIES.get('DIRECTORY'):
+        return DirectoryQueryStore(PERSISTED_QUERIES['DIRECTORY'])
+    return CacheQueryStore(PERSISTED_QUERIES.get('CACHE', 'default'))
+
+
+persisted_queries = PersistedQueryRegistry(
+    _store_from_settings(),
+    PERSISTED_QUERIES.get('AUTOMATIC', True),
+    PERSISTED_QUERIES.get('SIZE', 1024),
+)
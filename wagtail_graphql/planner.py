@@ -0,0 +1,204 @@
+# python
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+# django
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models.query import BaseIterable
+# graphql
+from graphql import ResolveInfo
+from graphql.language.ast import Field, FragmentSpread, SelectionSet
+# graphene
+import graphene
+from graphene.utils.str_converters import to_camel_case, to_snake_case
+# taggit
+from taggit.managers import TaggableManager
+from modelcluster.tags import ClusterTaggableManager
+# app
+from .loaders import request_cache
+from .registry import registry
+
+# (type condition, field) pairs, a condition of None applies to every type
+Selections = List[Tuple[Optional[str], Field]]
+
+# GraphQL field names to attribute names, per graphene type
+_attname_cache: Dict[Any, Dict[str, str]] = {}
+
+# columns every page needs regardless of the selection
+PAGE_REQUIRED_FIELDS: Tuple[str, ...] = ('id', 'content_type', 'path', 'depth')
+# columns of the live page read by ``PageRevision.as_page_object``
+REVISION_REQUIRED_FIELDS: Tuple[str, ...] = (
+    'numchild', 'draft_title', 'live', 'has_unpublished_changes', 'owner', 'locked',
+    'latest_revision_created_at', 'first_published_at',
+)
+
+
+class ModelPlan:
+    """Query options for one concrete page model."""
+
+    def __init__(self, only: FrozenSet[str] = frozenset(), select_related: FrozenSet[str] = frozenset(),
+                 prefetch_related: FrozenSet[str] = frozenset()) -> None:
+        self.only = only
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+
+    def apply(self, queryset: models.QuerySet) -> models.QuerySet:
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        if self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+class QueryPlan:
+    """Query options for every concrete page model a selection can return."""
+
+    def __init__(self, plans: Dict[type, ModelPlan]) -> None:
+        self.plans = plans
+        self.iterable_class = type('PlannedSpecificIterable', (PlannedSpecificIterable,), {'plan': self})
+
+    def apply(self, model: type, queryset: models.QuerySet) -> models.QuerySet:
+        plan = self.plans.get(model)
+        return plan.apply(queryset) if plan else queryset
+
+    def specific(self, queryset: models.QuerySet) -> models.QuerySet:
+        """Like ``PageQuerySet.specific`` but applying the plan to each page type query."""
+        clone = queryset.all()
+        clone._iterable_class = self.iterable_class
+        return clone
+
+
+class PlannedSpecificIterable(BaseIterable):
+    plan: QueryPlan
+
+    def __iter__(self):
+        pks_and_types = list(self.queryset.values_list('pk', 'content_type'))
+        pks_by_type: Dict[int, list] = defaultdict(list)
+        for pk, content_type in pks_and_types:
+            pks_by_type[content_type].append(pk)
+
+        pages_by_type = {}
+        for content_type, pks in pks_by_type.items():
+            model = ContentType.objects.get_for_id(content_type).model_class() or self.queryset.model
+            pages = self.plan.apply(model, model.objects.filter(pk__in=pks))
+            pages_by_type[content_type] = dict((page.pk, page) for page in pages)
+
+        for pk, content_type in pks_and_types:
+            yield pages_by_type[content_type][pk]
+
+
+def _page_type_names() -> Set[str]:
+    return set(tp._meta.name for tp in registry.pages.values())
+
+
+def _collect(selection_set: Optional[SelectionSet], info: ResolveInfo, concrete: Set[str],
+             condition: Optional[str] = None) -> Iterator[Tuple[Optional[str], Field]]:
+    """Flatten fields, inline fragments and fragment spreads into (type condition, field) pairs."""
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, Field):
+            yield condition, selection
+            continue
+        if isinstance(selection, FragmentSpread):
+            selection = info.fragments[selection.name.value]
+        type_condition = selection.type_condition.name.value if selection.type_condition else None
+        # fragments on interfaces don't narrow an enclosing fragment on a concrete type
+        if type_condition not in concrete:
+            type_condition = condition
+        yield from _collect(selection.selection_set, info, concrete, type_condition)
+
+
+def _node_selections(info: ResolveInfo, concrete: Set[str]) -> Selections:
+    selections: Selections = []
+    for field_ast in info.field_asts:
+        selections.extend(_collect(field_ast.selection_set, info, concrete))
+
+    # connections select the pages in edges { node { ... } }
+    graphene_type = getattr(info.return_type, 'graphene_type', None)
+    if graphene_type is not None and issubclass(graphene_type, graphene.relay.Connection):
+        edges = [f for _, f in selections if f.name.value == 'edges']
+        nodes = [f for e in edges for _, f in _collect(e.selection_set, info, concrete) if f.name.value == 'node']
+        selections = [s for n in nodes for s in _collect(n.selection_set, info, concrete)]
+    return selections
+
+
+def _attnames(graphene_type: Any) -> Dict[str, str]:
+    """Map the GraphQL field names of a type to its attribute names, ``fieldList2`` to ``field_list_2``."""
+    names = _attname_cache.get(graphene_type)
+    if names is None:
+        names = _attname_cache[graphene_type] = dict(
+            (getattr(field, 'name', None) or to_camel_case(name), name)
+            for name, field in graphene_type._meta.fields.items()
+        )
+    return names
+
+
+def _is_scalar_field(graphene_type: Any, name: str) -> bool:
+    field = graphene_type._meta.fields.get(name)
+    if field is None:
+        return False
+    type_ = field.type
+    while hasattr(type_, 'of_type'):
+        type_ = type_.of_type
+    return isinstance(type_, type) and issubclass(type_, graphene.Scalar)
+
+
+def _add_field(model: Any, graphene_type: Any, name: str,
+               only: Set[str], select_related: Set[str], prefetch_related: Set[str]) -> None:
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return
+    if isinstance(field, ClusterTaggableManager):
+        accessor = field.through._meta.get_field('content_object').remote_field.get_accessor_name()
+        prefetch_related.add(accessor + '__tag')
+    elif isinstance(field, TaggableManager) or field.many_to_many or field.one_to_many:
+        prefetch_related.add(name)
+    elif field.concrete:
+        only.add(name)
+        if field.is_relation and not _is_scalar_field(graphene_type, name):
+            select_related.add(name)
+
+
+def _model_plan(model: Any, graphene_type: Any, selections: Selections, required: Tuple[str, ...]) -> ModelPlan:
+    names = set(i._meta.name for i in graphene_type._meta.interfaces)
+    names.add(graphene_type._meta.name)
+
+    only: Set[str] = set(PAGE_REQUIRED_FIELDS + required)
+    select_related: Set[str] = set()
+    prefetch_related: Set[str] = set()
+    attnames = _attnames(graphene_type)
+    for condition, field in selections:
+        if condition is None or condition in names:
+            name = field.name.value
+            _add_field(model, graphene_type, attnames.get(name) or to_snake_case(name),
+                       only, select_related, prefetch_related)
+
+    return ModelPlan(
+        only=frozenset(only),
+        select_related=frozenset(select_related),
+        prefetch_related=frozenset(prefetch_related),
+    )
+
+
+def plan_pages(info: ResolveInfo, required: Tuple[str, ...] = ()) -> QueryPlan:
+    """Plan the queries for the pages returned by a field, memoized for the request.
+
+    Walks the whole selection, including inline fragments and fragment spreads, and works out the
+    columns to load, the relations to join and the relations to prefetch for each page type.
+    Unselected columns, StreamFields in particular, are deferred; ``required`` lists the extra
+    columns a resolver reads itself.
+    """
+    key = (tuple(id(f) for f in info.field_asts), required)
+    plans = request_cache(info.context).setdefault('plans', {})
+    if key not in plans:
+        selections = _node_selections(info, _page_type_names())
+        plans[key] = QueryPlan(dict(
+            (model, _model_plan(model, graphene_type, selections, required))
+            for model, graphene_type in registry.pages.items()
+        ))
+    return plans[key]
@@ -15,6 +15,8 @@ class Registry:
     _snippets_by_name = RegistryItem()
     _streamfield_blocks = RegistryItem()
     _streamfield_scalar_blocks = RegistryItem()
+    _streamfield_block_types = RegistryItem()
+    _streamfield_root_blocks = RegistryItem()
     _page_prefetch = {
         'content_type', 'owner',
         'live_revision', 'page_ptr'
@@ -28,6 +30,14 @@ class Registry:
     def scalar_blocks(self) -> RegistryItem:
         return self._streamfield_scalar_blocks
 
+    @property
+    def block_types(self) -> RegistryItem:
+        return self._streamfield_block_types
+
+    @property
+    def root_blocks(self) -> RegistryItem:
+        return self._streamfield_root_blocks
+
     @property
     def django(self) -> RegistryItem:
         return self._django
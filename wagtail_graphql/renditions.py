@@ -0,0 +1,81 @@
+# python
+import logging
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Set, Tuple
+# django
+from django.db import connection
+# wagtail
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+# app
+from .settings import RENDITION_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def generate_rendition(image_id: Any, filter_spec: str) -> Any:
+    """Generate a rendition, closing the database connection of worker threads."""
+    try:
+        return get_image_model().objects.get(pk=image_id).get_rendition(filter_spec)
+    except Exception:
+        logger.exception("Rendition %s of image %s failed", filter_spec, image_id)
+        raise
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def missing_renditions(images: Iterable[Any], filter_specs: Iterable[str]) -> List[Tuple[Any, str]]:
+    """The ``(image, filter spec)`` pairs without a rendition, looked up with one query."""
+    images = list(images)
+    filters = [Filter(spec=spec) for spec in filter_specs]
+    if not images or not filters:
+        return []
+    existing = set(images[0].get_rendition_model().objects.filter(
+        image_id__in=[image.pk for image in images],
+        filter_spec__in=[filter_.spec for filter_ in filters],
+    ).values_list('image_id', 'filter_spec', 'focal_point_key'))
+    return [(image, filter_.spec) for image in images for filter_ in filters
+            if (image.pk, filter_.spec, filter_.get_cache_key(image)) not in existing]
+
+
+class RenditionPool:
+    """Generate renditions in a pool of background threads.
+
+    The pool starts with the first rendition submitted and a rendition already waiting for a
+    worker isn't submitted again.  With no workers, renditions are generated right away.
+    """
+
+    def __init__(self, max_workers: int = RENDITION_WORKERS) -> None:
+        self.max_workers = max_workers
+        self.executor: Optional[Executor] = None
+        self._pending: Set[Tuple[Any, str]] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, image_id: Any, filter_spec: str) -> Optional[Future]:
+        key = (image_id, filter_spec)
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+            if self.executor is None and self.max_workers > 0:
+                self.executor = ThreadPoolExecutor(self.max_workers)
+
+        if self.executor is None:
+            future: Future = Future()
+            try:
+                future.set_result(generate_rendition(image_id, filter_spec))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = self.executor.submit(generate_rendition, image_id, filter_spec)
+        future.add_done_callback(lambda _: self._done(key))
+        return future
+
+    def _done(self, key: Tuple[Any, str]) -> None:
+        with self._lock:
+            self._pending.discard(key)
+
+
+rendition_pool = RenditionPool()
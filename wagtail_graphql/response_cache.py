@@ -0,0 +1,215 @@
+# python
+import hashlib
+import json
+import uuid
+import weakref
+from functools import partial
+from typing import Any, FrozenSet, Iterable, List, Optional, Set, Tuple
+# django
+from django.core.cache import caches
+from django.db import models
+# graphql
+from graphql import ResolveInfo, get_named_type
+from graphql.backend.base import GraphQLDocument
+from graphql.language.ast import Field
+from graphql.language.visitor import TypeInfoVisitor, Visitor, visit
+from graphql.utils.type_info import TypeInfo
+# graphene
+import graphene
+# promise
+from promise import Promise, is_thenable
+# wagtail
+from wagtail.core.models import Page as wagtailPage
+# app
+from .loaders import request_cache
+from .permissions import permission_fingerprint
+from .persisted import query_hash
+from .registry import registry
+from .settings import RESPONSE_CACHE
+from .types.core import Page as PageInterface
+
+# fields whose value depends on more than the site and the view restrictions, e.g. on the session
+DEFAULT_EXCLUDED_FIELDS = ('Query.user', 'Query.preview', 'Query.previewAdd')
+
+
+class _FieldCollector(Visitor):
+    def __init__(self, type_info: TypeInfo) -> None:
+        self.type_info = type_info
+        self.fields: set = set()
+
+    def enter_Field(self, node: Field, *args) -> None:
+        parent_type = self.type_info.get_parent_type()
+        if parent_type is not None:
+            self.fields.add('%s.%s' % (parent_type.name, node.name.value))
+
+
+def page_tags(page: wagtailPage) -> List[str]:
+    """The tags of a page and of the page lists of its ancestors."""
+    steplen = wagtailPage.steplen
+    return ['page:%s' % page.pk] + ['tree:' + page.path[:i] for i in range(steplen, len(page.path), steplen)]
+
+
+def model_tags(instance: models.Model) -> List[str]:
+    """The tags of an object and of the lists of its model."""
+    label = instance._meta.label_lower
+    return [label, '%s:%s' % (label, instance.pk)]
+
+
+def instance_tags(instance: models.Model) -> Tuple[str, ...]:
+    if isinstance(instance, wagtailPage):
+        if getattr(instance, 'revision', None) is not None:
+            return 'page:%s' % instance.pk, 'revisions:%s' % instance.pk
+        return 'page:%s' % instance.pk,
+    return '%s:%s' % (instance._meta.label_lower, instance.pk),
+
+
+def _collection_tags(root: Any, info: ResolveInfo) -> List[str]:
+    """Tags of a field listing objects, or of a lookup that found nothing."""
+    graphene_type = getattr(get_named_type(info.return_type), 'graphene_type', None)
+    if isinstance(graphene_type, type) and issubclass(graphene_type, graphene.relay.Connection):
+        graphene_type = getattr(graphene_type, '_meta').node
+    if graphene_type is PageInterface or graphene_type in registry.pages.values():
+        if isinstance(root, wagtailPage):
+            return ['tree:' + root.path]
+        site = getattr(info.context, 'site', None)
+        return ['tree:' + site.root_page.path] if site else []
+
+    meta = getattr(graphene_type, '_meta', None)
+    types = getattr(meta, 'types', None) or (graphene_type,)   # unions
+    models_ = (getattr(getattr(tp, '_meta', None), 'model', None) for tp in types)
+    return [model._meta.label_lower for model in models_ if model is not None]
+
+
+def _tag_collection(tags: Set[str], root: Any, info: ResolveInfo, value: Any) -> Any:
+    if value is None or isinstance(value, (list, tuple, models.QuerySet, graphene.relay.Connection)):
+        tags.update(_collection_tags(root, info))
+    return value
+
+
+class ResponseTagsMiddleware:
+    """Collect the tags of a response being cached.
+
+    Objects are tagged when their fields resolve, lists and empty lookups with the page tree or the
+    model they come from.
+    """
+
+    def resolve(self, next, root, info: ResolveInfo, **args):
+        tags = request_cache(info.context).get('response_tags')
+        if tags is None:
+            return next(root, info, **args)
+        if isinstance(root, models.Model):
+            tags.update(instance_tags(root))
+        result = next(root, info, **args)
+        if is_thenable(result):
+            return Promise.resolve(result).then(partial(_tag_collection, tags, root, info))
+        return _tag_collection(tags, root, info, result)
+
+
+class ResponseCache:
+    """Cache of the data of whole query responses in one of the Django ``CACHES``.
+
+    Responses are keyed on the query, the operation name, the variables, the site and the view
+    restrictions of the user.  Queries selecting one of the ``excluded`` fields, given as
+    ``'Type.field'``, and mutations aren't cached.
+
+    Each response stores the version of its tags, the pages, objects and lists it read, and is
+    stale once one of them is invalidated.  Every invalidation also bumps a generation, responses
+    that ran while it changed aren't stored.
+    """
+    key_prefix = 'wagtail_graphql:response'
+
+    def __init__(self, cache_alias: Optional[str] = None, timeout: Optional[int] = 60,
+                 exclude: Iterable[str] = ()) -> None:
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.excluded = set(DEFAULT_EXCLUDED_FIELDS)
+        self.excluded.update(exclude)
+        self._fields: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_alias)
+
+    def exclude(self, *fields: str) -> None:
+        self.excluded.update(fields)
+
+    def selected_fields(self, document: GraphQLDocument) -> FrozenSet[str]:
+        """Every ``'Type.field'`` a document selects, memoized for cached documents."""
+        fields = self._fields.get(document)
+        if fields is None:
+            type_info = TypeInfo(document.schema)
+            collector = _FieldCollector(type_info)
+            visit(document.document_ast, TypeInfoVisitor(type_info, collector))
+            fields = self._fields[document] = frozenset(collector.fields)
+        return fields
+
+    def cacheable(self, document: GraphQLDocument, operation_name: Optional[str]) -> bool:
+        return document.get_operation_type(operation_name) == 'query' and \
+            not (self.selected_fields(document) & self.excluded)
+
+    def key(self, request: Any, query: str, variables: Optional[dict], operation_name: Optional[str]) -> str:
+        site = getattr(request, 'site', None)
+        payload = json.dumps([
+            query_hash(query),
+            operation_name,
+            variables,
+            site.pk if site else None,
+            permission_fingerprint(request),
+        ], sort_keys=True, default=str)
+        return '%s:%s' % (self.key_prefix, hashlib.sha256(payload.encode('utf-8')).hexdigest())
+
+    def _tag_key(self, tag: str) -> str:
+        return '%s:tag:%s' % (self.key_prefix, tag)
+
+    @property
+    def _generation_key(self) -> str:
+        return self.key_prefix + ':generation'
+
+    def generation(self) -> Any:
+        """The current generation, read before executing a query to store its response."""
+        return caches[self.cache_alias].get(self._generation_key, 0)
+
+    def get(self, key: str) -> Any:
+        cache = caches[self.cache_alias]
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        data, versions = entry
+        current = cache.get_many([self._tag_key(tag) for tag in versions])
+        if any(current.get(self._tag_key(tag)) != version for tag, version in versions.items()):
+            return None
+        return data
+
+    def set(self, key: str, data: Any, tags: Iterable[str] = (), generation: Any = None) -> None:
+        """Store a response, unless something was invalidated since ``generation`` was read."""
+        cache = caches[self.cache_alias]
+        keys = dict((self._tag_key(tag), tag) for tag in tags)
+        current = cache.get_many(list(keys) + [self._generation_key])
+        if generation is not None and current.pop(self._generation_key, 0) != generation:
+            return
+        current.pop(self._generation_key, None)
+        missing = dict((tag_key, uuid.uuid4().hex) for tag_key in keys if tag_key not in current)
+        if missing:
+            cache.set_many(missing, None)
+            current.update(missing)
+        versions = dict((tag, current[tag_key]) for tag_key, tag in keys.items())
+        cache.set(key, (data, versions), self.timeout)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        """Make every response tagged with one of ``tags`` stale."""
+        if self.enabled:
+            cache = caches[self.cache_alias]
+            # bumped first, responses running now read it before the new tag versions
+            try:
+                cache.incr(self._generation_key)
+            except ValueError:
+                cache.set(self._generation_key, 1, None)
+            version = uuid.uuid4().hex
+            cache.set_many(dict((self._tag_key(tag), version) for tag in tags), None)
+
+
+response_cache = ResponseCache(
+    RESPONSE_CACHE.get('CACHE'),
+    RESPONSE_CACHE.get('TIMEOUT', 60),
+    RESPONSE_CACHE.get('EXCLUDE', ()),
+)
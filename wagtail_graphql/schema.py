@@ -1,5 +1,11 @@
-# typings
-from typing import Any  # noqa
+# python
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
 # django
 from django.utils.text import camel_case_to_spaces
 # graphql
@@ -11,55 +17,71 @@ from graphene_django.converter import String
 # app
 from .relay import RelayMixin
 from .registry import registry
-from .actions import add_apps
-# add all the apps from the settings
-add_apps()
-# mixins
-from .types import (  # noqa: E402
-    AuthQueryMixin, LoginMutation, LogoutMutation,
-    DocumentQueryMixin,
-    ImageQueryMixin,
-    InfoQueryMixin,
-    MenusQueryMixin,
-    PagesQueryMixin,
-    SettingsQueryMixin,
-    SnippetsQueryMixin,
-)
 
+logger = logging.getLogger(__name__)
 
 # api version
 GRAPHQL_API_FORMAT = (0, 2, 0)
 
-# mixins
-AuthQueryMixin_ = AuthQueryMixin()          # type: Any
-DocumentQueryMixin_ = DocumentQueryMixin()  # type: Any
-ImageQueryMixin_ = ImageQueryMixin()        # type: Any
-InfoQueryMixin_ = InfoQueryMixin()          # type: Any
-MenusQueryMixin_ = MenusQueryMixin()        # type: Any
-PagesQueryMixin_ = PagesQueryMixin()        # type: Any
-SettingsQueryMixin_ = SettingsQueryMixin()  # type: Any
-SnippetsQueryMixin_ = SnippetsQueryMixin()  # type: Any
-
-
-class Query(graphene.ObjectType,
-            AuthQueryMixin_,
-            DocumentQueryMixin_,
-            ImageQueryMixin_,
-            InfoQueryMixin_,
-            MenusQueryMixin_,
-            PagesQueryMixin_,
-            SettingsQueryMixin_,
-            SnippetsQueryMixin_,
-            RelayMixin
-            ):
-    # API Version
-    format = graphene.Field(String)
-
-    def resolve_format(self, _info: ResolveInfo):
-        return '%d.%d.%d' % GRAPHQL_API_FORMAT
+# seconds taken by each phase of the last schema build
+build_timings: Dict[str, float] = OrderedDict()
+
+_schema: Optional[graphene.Schema] = None
+_lock = threading.Lock()
+
+
+@contextmanager
+def _phase(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    build_timings[name] = time.perf_counter() - start
+
+
+def query_type() -> type:
+    # the mixins depend on the registered models
+    from .types import (
+        AuthQueryMixin,
+        DocumentQueryMixin,
+        ImageQueryMixin,
+        InfoQueryMixin,
+        MenusQueryMixin,
+        PagesQueryMixin,
+        SettingsQueryMixin,
+        SnippetsQueryMixin,
+    )
+
+    # mixins
+    AuthQueryMixin_ = AuthQueryMixin()          # type: Any
+    DocumentQueryMixin_ = DocumentQueryMixin()  # type: Any
+    ImageQueryMixin_ = ImageQueryMixin()        # type: Any
+    InfoQueryMixin_ = InfoQueryMixin()          # type: Any
+    MenusQueryMixin_ = MenusQueryMixin()        # type: Any
+    PagesQueryMixin_ = PagesQueryMixin()        # type: Any
+    SettingsQueryMixin_ = SettingsQueryMixin()  # type: Any
+    SnippetsQueryMixin_ = SnippetsQueryMixin()  # type: Any
+
+    class Query(graphene.ObjectType,
+                AuthQueryMixin_,
+                DocumentQueryMixin_,
+                ImageQueryMixin_,
+                InfoQueryMixin_,
+                MenusQueryMixin_,
+                PagesQueryMixin_,
+                SettingsQueryMixin_,
+                SnippetsQueryMixin_,
+                RelayMixin
+                ):
+        # API Version
+        format = graphene.Field(String)
+
+        def resolve_format(self, _info: ResolveInfo):
+            return '%d.%d.%d' % GRAPHQL_API_FORMAT
+
+    return Query
 
 
 def mutation_parameters() -> dict:
+    from .types import LoginMutation, LogoutMutation
     dict_params = {
         'login': LoginMutation.Field(),
         'logout': LogoutMutation.Field(),
@@ -69,13 +91,51 @@ def mutation_parameters() -> dict:
     return dict_params
 
 
-Mutations = type("Mutation",
-                 (graphene.ObjectType,),
-                 mutation_parameters()
-                 )
+def build_schema() -> graphene.Schema:
+    """Register the models of the ``APPS`` and build the schema, timing each phase.
+
+    Models come from the app registry, so building the schema doesn't query the database.
+    """
+    from .actions import add_app, add_base_page, app_prefixes
+
+    build_timings.clear()
+    start = time.perf_counter()
+    with _phase('base page'):
+        add_base_page()
+    for app, prefix in app_prefixes():
+        with _phase('app %s' % app):
+            add_app(app, prefix=prefix)
+    with _phase('query'):
+        query = query_type()
+    with _phase('mutation'):
+        mutation = type("Mutation", (graphene.ObjectType,), mutation_parameters())
+    with _phase('schema'):
+        schema = graphene.Schema(
+            query=query,
+            mutation=mutation,
+            types=list(registry.models.values())
+        )
+    phases = ', '.join('%s: %.1fms' % (name, seconds * 1000) for name, seconds in build_timings.items())
+    build_timings['total'] = time.perf_counter() - start
+    logger.info('Built the GraphQL schema in %.1fms (%s)', build_timings['total'] * 1000, phases)
+    return schema
+
+
+def get_schema() -> graphene.Schema:
+    """The schema, built once on first use."""
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                _schema = build_schema()
+    return _schema
+
 
-schema = graphene.Schema(
-    query=Query,
-    mutation=Mutations,
-    types=list(registry.models.values())
-)
+if sys.version_info >= (3, 7):
+    def __getattr__(name: str) -> Any:
+        # ``wagtail_graphql.schema.schema`` is built when first imported
+        if name == 'schema':
+            return get_schema()
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+else:   # pragma: no cover
+    schema = get_schema()
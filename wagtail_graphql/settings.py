@@ -11,6 +11,21 @@ else:   # pragma: no cover
 URL_PREFIX = SETTINGS.get('URL_PREFIX', {})
 LOAD_GENERIC_SCALARS = SETTINGS.get('GENERIC_SCALARS', True)
 RELAY = SETTINGS.get('RELAY', False)
+RESTRICTIONS_CACHE = SETTINGS.get('RESTRICTIONS_CACHE', None)
+RESTRICTIONS_SIZE = SETTINGS.get('RESTRICTIONS_SIZE', 1024)
+RESTRICTIONS_TIMEOUT = SETTINGS.get('RESTRICTIONS_TIMEOUT', 5)
+PERSISTED_QUERIES = SETTINGS.get('PERSISTED_QUERIES', {})
+DOCUMENT_CACHE_SIZE = SETTINGS.get('DOCUMENT_CACHE_SIZE', 128)
+RESPONSE_CACHE = SETTINGS.get('RESPONSE_CACHE', {})
+FIELD_CACHE = SETTINGS.get('FIELD_CACHE', {})
+MISSING_RENDITIONS = SETTINGS.get('MISSING_RENDITIONS', 'generate')
+RENDITION_WORKERS = SETTINGS.get('RENDITION_WORKERS', 2)
+RENDITION_PLACEHOLDER = SETTINGS.get('RENDITION_PLACEHOLDER', None)
+MAX_PAGE_SIZE = SETTINGS.get('MAX_PAGE_SIZE', None)
+QUERY_COST = SETTINGS.get('QUERY_COST', {})
+TIMING = SETTINGS.get('TIMING', {})
+SCHEMA_SNAPSHOT = SETTINGS.get('SCHEMA_SNAPSHOT', {})
+PREBUILD_SCHEMA = SETTINGS.get('PREBUILD_SCHEMA', False)
 
 # wagtail settings
 try:
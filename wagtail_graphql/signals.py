@@ -0,0 +1,96 @@
+# django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import post_delete, post_save, pre_save, m2m_changed
+# wagtail
+from wagtail.core.models import (
+    Page as wagtailPage, PageRevision, PageViewRestriction, CollectionViewRestriction, get_page_models
+)
+from wagtail.core.signals import page_published, page_unpublished
+from wagtail.documents.models import get_document_model
+from wagtail.images import get_image_model
+from wagtail.snippets.models import get_snippet_models
+# app
+from .field_cache import field_cache
+from .permissions import restriction_index
+from .response_cache import model_tags, page_tags, response_cache
+from .settings import settings_registry
+
+
+def clear_restriction_index(**_kwargs) -> None:
+    restriction_index.clear()
+
+
+def invalidate_page(instance, **_kwargs) -> None:
+    response_cache.invalidate(page_tags(instance))
+
+
+def invalidate_page_revisions(instance, **_kwargs) -> None:
+    response_cache.invalidate(['revisions:%s' % instance.page_id])
+
+
+def invalidate_moved_page(instance, update_fields=None, **_kwargs) -> None:
+    """Invalidate a page and its descendants when its place in the tree changes.
+
+    E.g. moving the page, changing its slug or reordering its siblings.
+    """
+    if instance.pk is None:
+        return
+    if update_fields is not None and not {'url_path', 'path'} & set(update_fields):
+        return
+    old = wagtailPage.objects.filter(pk=instance.pk).values_list('url_path', 'path').first()
+    if old is None:
+        return
+    if old == (instance.url_path, instance.path):
+        if update_fields is None:
+            # ``Page.move`` updates the paths before saving, e.g. reordering siblings
+            response_cache.invalidate(page_tags(instance) + ['tree:' + instance.path])
+        return
+    old_page = wagtailPage(pk=instance.pk, path=old[1])
+    tags = page_tags(instance) + page_tags(old_page)
+    if instance.numchild:
+        descendants = wagtailPage.objects.filter(path__startswith=old[1], depth__gt=instance.depth)
+        for pk in descendants.values_list('pk', flat=True):
+            tags.append('page:%s' % pk)
+            field_cache.invalidate(wagtailPage, pk)
+    response_cache.invalidate(tags)
+
+
+def invalidate_model(instance, **_kwargs) -> None:
+    response_cache.invalidate(model_tags(instance))
+
+
+def invalidate_fields(sender, instance, **_kwargs) -> None:
+    field_cache.invalidate(sender, instance.pk)
+
+
+def register_signal_handlers() -> None:
+    for model in (PageViewRestriction, CollectionViewRestriction):
+        post_save.connect(clear_restriction_index, sender=model)
+        post_delete.connect(clear_restriction_index, sender=model)
+        m2m_changed.connect(clear_restriction_index, sender=model.groups.through)
+
+    # the index stores user groups and the paths of restricted pages
+    m2m_changed.connect(clear_restriction_index, sender=get_user_model().groups.through)
+    post_delete.connect(clear_restriction_index, sender=Group)
+    post_save.connect(clear_restriction_index, sender=wagtailPage)  # page moves
+
+    # cached responses
+    page_published.connect(invalidate_page)
+    page_unpublished.connect(invalidate_page)
+    post_delete.connect(invalidate_page, sender=wagtailPage)
+    for model in get_page_models():
+        pre_save.connect(invalidate_moved_page, sender=model)
+    post_save.connect(invalidate_page_revisions, sender=PageRevision)
+
+    models = [get_image_model(), get_document_model()] + list(get_snippet_models())
+    if settings_registry is not None:
+        models.extend(settings_registry)
+    for model in models:
+        post_save.connect(invalidate_model, sender=model)
+        post_delete.connect(invalidate_model, sender=model)
+
+    # cached fields
+    for model in list(get_page_models()) + [get_image_model(), get_document_model()]:
+        post_save.connect(invalidate_fields, sender=model)
+        post_delete.connect(invalidate_fields, sender=model)
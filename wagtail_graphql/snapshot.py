@@ -0,0 +1,115 @@
+# python
+import hashlib
+import json
+from typing import Any, Dict, Optional
+# django
+from django.apps import apps
+# graphql
+from graphql.type import GraphQLInterfaceType, GraphQLObjectType, GraphQLUnionType
+# wagtail
+from wagtail.core.fields import StreamField
+# app
+from . import __version__
+from .registry import registry
+from .settings import SETTINGS
+
+
+def _field_signature(field: Any) -> list:
+    related = field.related_model._meta.label if field.is_relation and field.related_model else None
+    signature = [field.name, '%s.%s' % (field.__class__.__module__, field.__class__.__name__), related,
+                 getattr(field, 'null', False)]
+    if isinstance(field, StreamField):
+        from .types.streamfield import block_signature
+        signature.append(block_signature(field.stream_block))
+    return signature
+
+
+def model_signature(settings: Optional[dict] = None) -> str:
+    """Hash of everything the schema is generated from: the settings, the models and their blocks.
+
+    Reads model metadata only, it doesn't build the schema.
+    """
+    from .actions import app_prefixes
+    from .schema import GRAPHQL_API_FORMAT
+    from wagtail.snippets.models import get_snippet_models
+
+    settings = SETTINGS if settings is None else settings
+    snippets = set(get_snippet_models())
+    models = []
+    for app, prefix in app_prefixes(settings):
+        try:
+            app_models = apps.get_app_config(app).get_models()
+        except LookupError:
+            continue
+        for model in app_models:
+            models.append([app, prefix, model._meta.label, model in snippets,
+                           [_field_signature(f) for f in model._meta.get_fields() if f.concrete]])
+    data = {
+        'version': __version__,
+        'format': GRAPHQL_API_FORMAT,
+        'relay': settings.get('RELAY', False),
+        'generic_scalars': settings.get('GENERIC_SCALARS', True),
+        'models': models,
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _name(tp: Any) -> Optional[str]:
+    meta = getattr(tp, '_meta', None)
+    return meta.name if meta is not None else None
+
+
+def snapshot(schema: Any) -> Dict[str, Any]:
+    """The generated type graph of a schema, keyed by the signature of the models it came from."""
+    from .schema import build_timings
+
+    type_map = schema.get_type_map()
+    implementations: Dict[str, list] = {}
+    for tp in type_map.values():
+        if isinstance(tp, GraphQLObjectType):
+            for interface in tp.interfaces:
+                implementations.setdefault(interface.name, []).append(tp.name)
+    blocks = set(('%s.%s' % (cls.__module__, cls.__qualname__), _name(tp))
+                 for cls, tp in registry.blocks.items() if isinstance(cls, type) and _name(tp))
+    # compound blocks, one type per structure
+    blocks.update((signature[0], _name(tp)) for (signature, _prefix), tp in registry.block_types.items()
+                  if isinstance(tp, type) and _name(tp))
+
+    return {
+        'signature': model_signature(),
+        'types': {
+            'pages': dict((cls._meta.label, _name(tp)) for cls, tp in registry.pages.items()),
+            'snippets': dict((cls._meta.label, _name(tp)) for cls, tp in registry.snippets.items()),
+            'settings': dict((name, cls._meta.label) for name, (_, cls) in registry.settings.items()),
+            'forms': sorted(registry.forms),
+            'django': sorted(registry.django),
+            'blocks': sorted(blocks),
+        },
+        'unions': dict((name, sorted(t.name for t in tp.types))
+                       for name, tp in type_map.items() if isinstance(tp, GraphQLUnionType)),
+        'interfaces': dict((name, sorted(implementations.get(name, [])))
+                           for name, tp in type_map.items()
+                           if isinstance(tp, GraphQLInterfaceType) and not name.startswith('__')),
+        'timings': dict(build_timings),
+        'schema': str(schema),
+    }
+
+
+def write_snapshot(path: str, schema: Any) -> Dict[str, Any]:
+    data = snapshot(schema)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    return data
+
+
+def read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def snapshot_is_current(path: str) -> bool:
+    data = read_snapshot(path)
+    return data is not None and data.get('signature') == model_signature()
@@ -0,0 +1,260 @@
+# python
+import logging
+import random
+import socket
+import threading
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+# django
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+# graphql
+from graphql import ResolveInfo, get_named_type
+# promise
+from promise import Promise, is_thenable
+# app
+from .loaders import request_cache
+from .settings import TIMING
+
+
+class ResolverStats:
+    __slots__ = ('calls', 'time', 'queries', 'db_time')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.time = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'calls': self.calls, 'time': _ms(self.time), 'queries': self.queries, 'dbTime': _ms(self.db_time)}
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class RequestTimings:
+    """Wall time, database queries and database time of one request, in total and per resolver path.
+
+    Paths are the field names from the root, without list indexes, and the type of the object
+    when the field is on an interface or union, e.g. ``pages.children.HomePage.body``.
+    """
+
+    def __init__(self) -> None:
+        self.time = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.resolvers: Dict[str, ResolverStats] = {}
+        self._paths: Dict[tuple, Tuple[str, Optional[str]]] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        """Count the database queries, installed with ``connection.execute_wrapper``."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - start
+
+    @contextmanager
+    def measure(self) -> Iterator['RequestTimings']:
+        start = perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            try:
+                yield self
+            finally:
+                self.time += perf_counter() - start
+
+    def path(self, info: ResolveInfo) -> str:
+        key = tuple(info.path or ())
+        parent_key = key[:-1]
+        while parent_key and isinstance(parent_key[-1], int):
+            parent_key = parent_key[:-1]
+        parent = self._paths.get(parent_key)
+        if parent is None:
+            path = info.field_name
+        else:
+            parent_path, parent_type = parent
+            if info.parent_type.name != parent_type:
+                parent_path += '.' + info.parent_type.name
+            path = parent_path + '.' + info.field_name
+        self._paths[key] = (path, getattr(get_named_type(info.return_type), 'name', None))
+        return path
+
+    def add(self, path: str, start: Tuple[float, int, float], value: Any = None) -> Any:
+        stats = self.resolvers.get(path)
+        if stats is None:
+            stats = self.resolvers[path] = ResolverStats()
+        stats.calls += 1
+        stats.time += perf_counter() - start[0]
+        stats.queries += self.queries - start[1]
+        stats.db_time += self.db_time - start[2]
+        return value
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'time': _ms(self.time),
+            'queries': self.queries,
+            'dbTime': _ms(self.db_time),
+            'resolvers': dict((path, stats.as_dict()) for path, stats in sorted(self.resolvers.items())),
+        }
+
+
+class ResolverTimingMiddleware:
+    """Record the time and database queries of every resolver of a timed request.
+
+    Resolvers returning promises are timed until the promise resolves, including the batched
+    loads they wait on.
+    """
+
+    def resolve(self, next, root, info: ResolveInfo, **args):
+        timings = request_cache(info.context).get('timings')
+        if timings is None:
+            return next(root, info, **args)
+        path = timings.path(info)
+        start = (perf_counter(), timings.queries, timings.db_time)
+        try:
+            result = next(root, info, **args)
+        except Exception:
+            timings.add(path, start)
+            raise
+        if is_thenable(result):
+            return Promise.resolve(result).then(partial(timings.add, path, start))
+        return timings.add(path, start, result)
+
+
+class LoggingSink:
+    """Log the timings of each request, and of each resolver at the debug level."""
+
+    def __init__(self, logger: str = 'wagtail_graphql.timing', level: int = logging.INFO) -> None:
+        self.logger = logging.getLogger(logger)
+        self.level = level
+
+    def report(self, timings: RequestTimings) -> None:
+        self.logger.log(self.level, 'GraphQL request %.3fms, %d queries in %.3fms',
+                        timings.time * 1000, timings.queries, timings.db_time * 1000)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for path, stats in sorted(timings.resolvers.items()):
+                self.logger.debug('%s: %d calls %.3fms, %d queries in %.3fms', path, stats.calls,
+                                  stats.time * 1000, stats.queries, stats.db_time * 1000)
+
+
+class StatsdSink:
+    """Send the timings to statsd over UDP, one packet per request."""
+
+    def __init__(self, host: str = 'localhost', port: int = 8125, prefix: str = 'wagtail_graphql') -> None:
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket: Optional[socket.socket] = None
+
+    def lines(self, timings: RequestTimings) -> List[str]:
+        lines = [
+            '%s.request.time:%.3f|ms' % (self.prefix, timings.time * 1000),
+            '%s.request.queries:%d|c' % (self.prefix, timings.queries),
+        ]
+        for path, stats in sorted(timings.resolvers.items()):
+            name = '%s.resolver.%s' % (self.prefix, path)
+            lines.append('%s.time:%.3f|ms' % (name, stats.time * 1000))
+            lines.append('%s.calls:%d|c' % (name, stats.calls))
+            lines.append('%s.queries:%d|c' % (name, stats.queries))
+            lines.append('%s.db_time:%.3f|ms' % (name, stats.db_time * 1000))
+        return lines
+
+    def report(self, timings: RequestTimings) -> None:
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._socket.sendto('\n'.join(self.lines(timings)).encode(), self.address)
+        except OSError:
+            pass
+
+
+class PrometheusSink:
+    """Accumulate the timings as Prometheus counters, exposed by ``metrics_view``."""
+    metrics = (
+        ('calls', 'wagtail_graphql_resolver_calls_total', 'Resolver calls.'),
+        ('time', 'wagtail_graphql_resolver_seconds_total', 'Resolver wall time.'),
+        ('queries', 'wagtail_graphql_resolver_queries_total', 'Database queries of the resolver.'),
+        ('db_time', 'wagtail_graphql_resolver_db_seconds_total', 'Database time of the resolver.'),
+    )
+
+    def __init__(self) -> None:
+        self.resolvers: Dict[str, ResolverStats] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def report(self, timings: RequestTimings) -> None:
+        with self._lock:
+            self.requests += 1
+            for path, stats in timings.resolvers.items():
+                total = self.resolvers.get(path)
+                if total is None:
+                    total = self.resolvers[path] = ResolverStats()
+                for attr in ResolverStats.__slots__:
+                    setattr(total, attr, getattr(total, attr) + getattr(stats, attr))
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                '# HELP wagtail_graphql_requests_total Timed GraphQL requests.',
+                '# TYPE wagtail_graphql_requests_total counter',
+                'wagtail_graphql_requests_total %d' % self.requests,
+            ]
+            for attr, name, help_text in self.metrics:
+                lines.append('# HELP %s %s' % (name, help_text))
+                lines.append('# TYPE %s counter' % name)
+                for path, stats in sorted(self.resolvers.items()):
+                    lines.append('%s{path="%s"} %s' % (name, path, getattr(stats, attr)))
+        return '\n'.join(lines) + '\n'
+
+
+class ResolverTiming:
+    """Which requests are timed and where their timings go.
+
+    Requests carrying the ``header``, from staff users or with ``DEBUG`` on, get their timings in
+    the response ``extensions``.  A ``sample_rate`` share of all requests is reported to the
+    ``sinks``.
+    """
+
+    def __init__(self, header: Optional[str] = 'X-GraphQL-Timing', sinks: Optional[List[Any]] = None,
+                 sample_rate: float = 1.0) -> None:
+        self.header = header
+        self.sinks = sinks or []
+        self.sample_rate = sample_rate
+
+    def requested(self, request: Any) -> bool:
+        if not self.header or not request.META.get('HTTP_' + self.header.upper().replace('-', '_')):
+            return False
+        user = getattr(request, 'user', None)
+        return settings.DEBUG or bool(user is not None and user.is_staff)
+
+    def sampled(self) -> bool:
+        return bool(self.sinks) and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def report(self, timings: RequestTimings) -> None:
+        for sink in self.sinks:
+            sink.report(timings)
+
+
+def metrics_view(_request: Any) -> HttpResponse:
+    """Prometheus metrics of the ``PrometheusSink`` sinks."""
+    body = ''.join(sink.render() for sink in resolver_timing.sinks if isinstance(sink, PrometheusSink))
+    return HttpResponse(body, content_type='text/plain; version=0.0.4')
+
+
+def _sink_from_settings(config: Dict[str, Any]) -> Any:
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+resolver_timing = ResolverTiming(
+    header=TIMING.get('HEADER', 'X-GraphQL-Timing'),
+    sinks=[_sink_from_settings(config) for config in TIMING.get('SINKS', [])],
+    sample_rate=TIMING.get('SAMPLE_RATE', 1.0),
+)
@@ -0,0 +1,106 @@
+# python
+import base64
+import binascii
+from typing import Any, List, Optional, Tuple
+# django
+from django.db import models
+# graphene
+import graphene
+# wagtail
+from wagtail.core.models import Page as wagtailPage
+# app
+from ..filters import max_page_size
+
+
+def path_to_cursor(path: str) -> str:
+    return base64.b64encode(('path:' + path).encode()).decode()
+
+
+def cursor_to_path(cursor: Optional[str]) -> Optional[str]:
+    if cursor is None:
+        return None
+    try:
+        path = base64.b64decode(cursor.encode(), validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        path = ''
+    if not path.startswith('path:'):
+        raise ValueError("Invalid cursor '%s'" % cursor)
+    return path[len('path:'):]
+
+
+def paginate_pages(pages: Any, after: str = None, before: str = None, first: int = None,
+                   last: int = None) -> Tuple[List[wagtailPage], bool, bool]:
+    """Slice pages ordered by path after and before a path, returning the pages and whether
+    there are pages before and after them.
+
+    ``pages`` is a queryset, filtered on the path and sliced in the database, or a list.
+    """
+    for name, value in (('first', first), ('last', last)):
+        if value is not None and value < 0:
+            raise ValueError("Argument '%s' must be a non-negative integer" % name)
+
+    is_queryset = isinstance(pages, models.QuerySet)
+    if is_queryset:
+        if after is not None:
+            pages = pages.filter(path__gt=after)
+        if before is not None:
+            pages = pages.filter(path__lt=before)
+    else:
+        pages = [page for page in pages
+                 if (after is None or page.path > after) and (before is None or page.path < before)]
+
+    has_previous = has_next = False
+    if first is None and last is not None:
+        rows = list(pages.order_by('-path')[:last + 1]) if is_queryset else pages[::-1][:last + 1]
+        has_previous = len(rows) > last
+        return rows[:last][::-1], has_previous, has_next
+
+    rows = list(pages[:first + 1] if first is not None else pages)
+    if first is not None:
+        has_next = len(rows) > first
+        rows = rows[:first]
+    if last is not None:
+        has_previous = len(rows) > last
+        rows = rows[len(rows) - last:] if has_previous else rows
+    return rows, has_previous, has_next
+
+
+class PageConnectionField(graphene.relay.ConnectionField):
+    """Connection of pages ordered by path, paginated by keyset on the path.
+
+    Cursors encode the path of a page, so a page deep in the tree costs the same as the first one,
+    and the pages are only counted when ``totalCount`` is selected.  ``first`` and ``last`` are
+    capped to the ``max_page_size`` of pages.
+    """
+
+    @classmethod
+    def resolve_connection(cls, connection_type, args, resolved):
+        if isinstance(resolved, connection_type):   # pragma: no cover
+            return resolved
+
+        first, last = args.get('first'), args.get('last')
+        maximum = max_page_size('pages')
+        if maximum is not None:
+            if first is None and last is None:
+                first = maximum
+            first = min(first, maximum) if first is not None else None
+            last = min(last, maximum) if last is not None else None
+        pages, has_previous, has_next = paginate_pages(
+            resolved,
+            after=cursor_to_path(args.get('after')),
+            before=cursor_to_path(args.get('before')),
+            first=first,
+            last=last,
+        )
+        edges = [connection_type.Edge(node=page, cursor=path_to_cursor(page.path)) for page in pages]
+        connection = connection_type(
+            edges=edges,
+            page_info=graphene.relay.PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous,
+                has_next_page=has_next,
+            )
+        )
+        connection.iterable = resolved
+        return connection
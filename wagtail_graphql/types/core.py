@@ -3,9 +3,9 @@ from typing import cast
 # django
 from django.contrib.auth.models import User as wagtailUser
 from django.contrib.contenttypes.models import ContentType
+from django.db import models
 # graphql
 from graphql.execution.base import ResolveInfo
-from graphql.language.ast import InlineFragment
 # graphene
 import graphene
 # graphene_django
@@ -13,13 +13,17 @@ from graphene_django import DjangoObjectType
 from graphene_django.converter import convert_django_field, String, List
 # wagtail
 from wagtail.core.models import Page as wagtailPage, Site as wagtailSite
-from taggit.managers import TaggableManager, 
+from taggit.managers import TaggableManager
 from modelcluster.tags import ClusterTaggableManager
-from wagtail.core.utils import camelcase_to_underscore
 # app
+from ..field_cache import cached_field
+from ..filters import filter_pages, list_arguments, max_page_size, page_filters, paginate
 from ..settings import url_prefix_for_site, RELAY
 from ..registry import registry
 from ..permissions import with_page_permissions
+from ..loaders import ChildPages, children_loader
+from ..planner import plan_pages, REVISION_REQUIRED_FIELDS
+from .connections import PageConnectionField, cursor_to_path
 
 
 class User(DjangoObjectType):
@@ -59,6 +63,7 @@ class Page(interface_cls):
     draft_title = graphene.String()
     has_unpublished_changes = graphene.Boolean()
 
+    @cached_field
     def resolve_content_type(self, _info: ResolveInfo):
         self.content_type = ContentType.objects.get_for_model(self)
         return self.content_type.app_label + '.' + self.content_type.model_class().__name__
@@ -72,6 +77,7 @@ class Page(interface_cls):
             raise ValueError("Model %s is not a registered GraphQL type" % mdl)
         return model
 
+    @cached_field(vary_on_site=True)
     def resolve_url_path(self, info: ResolveInfo) -> str:
         self.url_path = cast(str, self.url_path)
         url_prefix = url_prefix_for_site(info)
@@ -79,34 +85,40 @@ class Page(interface_cls):
         return url.rstrip('/')
 
     if RELAY:
-        children = graphene.ConnectionField(lambda *x: PageConnection)
+        children = PageConnectionField(lambda *x: PageConnection)
     else:
         children = graphene.List(lambda *x: Page)
 
-    def resolve_children(self, info: ResolveInfo, **_kwargs):
-        query = wagtailPage.objects.child_of(self)
-        return with_page_permissions(
-            info.context,
-            query.specific()
-        ).live().order_by('path').all()
+    def resolve_children(self, info: ResolveInfo, **kwargs):
+        after, limit = None, None
+        if RELAY and kwargs.get('last') is None and kwargs.get('before') is None:
+            # load one more child than the connection returns for ``hasNextPage``
+            first, maximum = kwargs.get('first'), max_page_size('pages')
+            if maximum is not None:
+                first = min(first, maximum) if first is not None else maximum
+            after = cursor_to_path(kwargs.get('after'))
+            limit = first + 1 if first is not None and first >= 0 else None
+        return children_loader(info, plan_pages(info)).load((self.path, after, limit))
 
 
 # https://jossingram.wordpress.com/2018/04/19/wagtail-and-graphql/
 class FlatTags(graphene.String):
- 
+
     @classmethod
     def serialize(cls, value):
         tagsList = []
         for tag in value.all():
             tagsList.append(tag.name)
         return tagsList
- 
+
+
 @convert_django_field.register(ClusterTaggableManager)
 def convert_tag_field_to_string(field, registry=None):
     return graphene.Field(FlatTags,
-        description=field.help_text,
-        required=not field.null)
-    
+                          description=field.help_text,
+                          required=not field.null)
+
+
 @convert_django_field.register(TaggableManager)
 def convert_field_to_string(field, _registry=None):
     return List(String, description=field.help_text, required=not field.null)
@@ -122,6 +134,7 @@ def _resolve_preview(request, view):  # pragma: no cover
     if not form.is_valid():
         raise ValueError("Invalid preview data")
     form.save(commit=False)
+    page.is_preview = True  # built from the form data, not cached
     return page
 
 
@@ -133,13 +146,22 @@ if RELAY:
         class Edge:
             pass
 
+        total_count = graphene.Int()
+
+        def resolve_total_count(self, _info: ResolveInfo):
+            if isinstance(self.iterable, models.QuerySet):
+                return self.iterable.count()
+            if isinstance(self.iterable, ChildPages):
+                return self.iterable.total
+            return len(self.iterable)
+
 
 def PagesQueryMixin():  # noqa: C901
     class Mixin:
         if RELAY:
-            pages = graphene.ConnectionField(PageConnection)
+            pages = PageConnectionField(PageConnection, parent=graphene.Int(), **page_filters())
         else:
-            pages = graphene.List(Page, parent=graphene.Int())
+            pages = graphene.List(Page, parent=graphene.Int(), **list_arguments(), **page_filters())
 
         page = graphene.Field(Page,
                               id=graphene.Int(),
@@ -156,26 +178,20 @@ def PagesQueryMixin():  # noqa: C901
                                      parent=graphene.Int(required=True),
                                      )
 
-        def resolve_pages(self, info: ResolveInfo, parent: int = None, **_kwargs):
+        def resolve_pages(self, info: ResolveInfo, parent: int = None, **kwargs):
             query = wagtailPage.objects
 
-            # prefetch specific type pages
-            selections = set(camelcase_to_underscore(f.name.value)
-                             for f in info.field_asts[0].selection_set.selections
-                             if not isinstance(f, InlineFragment))
-            for pf in registry.page_prefetch_fields.intersection(selections):
-                query = query.select_related(pf)
-
             if parent is not None:
                 parent_page = wagtailPage.objects.filter(id=parent).first()
                 if parent_page is None:
                     raise ValueError(f'Page id={parent} not found.')
                 query = query.child_of(parent_page)
 
-            return with_page_permissions(
+            pages = filter_pages(with_page_permissions(
                 info.context,
-                query.specific()
-            ).live().order_by('path').all()
+                plan_pages(info).specific(query)
+            ).live().order_by('path'), **kwargs)
+            return pages if RELAY else paginate(pages, 'pages', **kwargs)
 
         def resolve_page(self, info: ResolveInfo, id: int = None, url: str = None, revision: int = None):
             query = wagtailPage.objects
@@ -186,9 +202,10 @@ def PagesQueryMixin():  # noqa: C901
                 query = query.filter(url_path=url_prefix + url.rstrip('/') + '/')
             else:   # pragma: no cover
                 raise ValueError("One of 'id' or 'url' must be specified")
+            plan = plan_pages(info, REVISION_REQUIRED_FIELDS) if revision is not None else plan_pages(info)
             page = with_page_permissions(
                 info.context,
-                query.specific()
+                plan.specific(query)
             ).live().first()
 
             if page is None:
@@ -229,7 +246,7 @@ def PagesQueryMixin():  # noqa: C901
         def resolve_show_in_menus(self, info: ResolveInfo):
             return with_page_permissions(
                 info.context,
-                wagtailPage.objects.filter(show_in_menus=True)
+                plan_pages(info).apply(wagtailPage, wagtailPage.objects.filter(show_in_menus=True))
             ).live().order_by('path')
     return Mixin
 
@@ -9,6 +9,7 @@ import graphene_django_optimizer as gql_optimizer
 # wagtail documents
 from wagtail.documents.models import Document as wagtailDocument
 # app
+from ..filters import collection_filters, filter_collection_items, list_arguments, paginate
 from ..permissions import with_collection_permissions
 
 
@@ -20,24 +21,25 @@ class Document(DjangoObjectType):
     filename = graphene.String()
     file_extension = graphene.String()
 
+    @gql_optimizer.resolver_hints(prefetch_related='tags')
     def resolve_tags(self: wagtailDocument, _info: ResolveInfo):
         return self.tags.all()
 
 
 def DocumentQueryMixin():
     class Mixin:
-        documents = graphene.List(Document)
+        documents = graphene.List(Document, **list_arguments(), **collection_filters())
         document = graphene.Field(Document,
                                   id=graphene.Int(required=True))
 
-        def resolve_documents(self, info: ResolveInfo):
-            return with_collection_permissions(
+        def resolve_documents(self, info: ResolveInfo, **kwargs):
+            return paginate(with_collection_permissions(
                 info.context,
                 gql_optimizer.query(
-                    wagtailDocument.objects.all(),
+                    filter_collection_items(wagtailDocument.objects.all(), **kwargs),
                     info
                 )
-            )
+            ), 'documents', **kwargs)
 
         def resolve_document(self, info: ResolveInfo, id: int):
             doc = with_collection_permissions(
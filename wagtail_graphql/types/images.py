@@ -1,7 +1,19 @@
+# python
+import base64
+import hashlib
+import hmac
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
 # graphql
+from graphql import get_named_type
 from graphql.execution.base import ResolveInfo
+from graphql.execution.values import get_argument_values
+from graphql.language.ast import Field, FragmentSpread
 # django
-from django.urls import reverse
+from django.conf import settings
+from django.urls import NoReverseMatch, get_script_prefix, get_urlconf, reverse
+from django.utils.http import RFC3986_SUBDELIMS
 # graphene
 import graphene
 # graphene_django
@@ -10,10 +22,13 @@ from graphene_django.converter import convert_django_field
 # graphene_django_optimizer
 import graphene_django_optimizer as gql_optimizer
 # wagtail images
-from wagtail.images.models import Image as wagtailImage
-from wagtail.images.views.serve import generate_signature
+from wagtail.images.models import AbstractRendition, Image as wagtailImage
 # app
+from ..field_cache import cached_field
+from ..loaders import rendition_loader, request_cache
+from ..filters import collection_filters, filter_collection_items, list_arguments, paginate
 from ..permissions import with_collection_permissions
+from ..settings import RENDITION_PLACEHOLDER
 
 
 @convert_django_field.register(wagtailImage)
@@ -55,49 +70,150 @@ class Image(DjangoObjectType):
     def resolve_focal_point(self: wagtailImage, _info: ResolveInfo):
         return self.get_focal_point()
 
+    @gql_optimizer.resolver_hints(prefetch_related='tags')
     def resolve_tags(self: wagtailImage, _info: ResolveInfo):
         return self.tags.all()
 
-    def resolve_url(self: wagtailImage, _info: ResolveInfo, rendition: str = None):
-        if not rendition:
-            if not self.has_focal_point():
-                rendition = "original"
+    @cached_field
+    def resolve_url(self: wagtailImage, info: ResolveInfo, rendition: str = None):
+        spec = filter_spec(self, rendition)
+        url = request_cache(info.context).get('image_urls', {}).get((self.pk, spec))
+        return url or generate_image_url(self, spec)
+
+    @cached_field(cache_if=lambda url: url is not None and not isinstance(url, PlaceholderUrl))
+    def resolve_url_link(self: wagtailImage, info: ResolveInfo, rendition: str = None):
+        spec = filter_spec(self, rendition)
+        loader = rendition_loader(info)
+        return loader.load((self, spec)).then(partial(rendition_url, self, spec, loader.missing_renditions))
+
+
+class PlaceholderUrl(str):
+    """Url standing in for a rendition that isn't generated yet."""
+
+
+def filter_spec(image: wagtailImage, rendition: Optional[str]) -> str:
+    if rendition:
+        return rendition
+    if not image.has_focal_point():
+        return "original"
+    fp = image.get_focal_point()
+    return 'fill-%dx%d-c100' % (fp.width, fp.height)
+
+
+def rendition_url(image: wagtailImage, filter_spec: str, missing_renditions: str,
+                  rendition: Optional[AbstractRendition]) -> Optional[str]:
+    if rendition is not None:
+        return rendition.url
+    if missing_renditions == 'background' and RENDITION_PLACEHOLDER:
+        return PlaceholderUrl(RENDITION_PLACEHOLDER)
+    if missing_renditions in ('defer', 'background'):
+        return PlaceholderUrl(generate_image_url(image, filter_spec))
+    return None
+
+
+class ImageUrlBuilder:
+    """Build the signed urls of the image serve view for many images at once.
+
+    The url pattern is reversed once per script prefix and urlconf, with placeholders for the
+    arguments, and the signatures share one keyed HMAC.  The urls are the same as ``reverse``
+    with ``generate_signature`` would give.
+    """
+    SIGNATURE = 'IMAGESIGNATURE'
+    IMAGE_ID = '987654321'
+    FILTER_SPEC = 'IMAGEFILTERSPEC'
+    safe = RFC3986_SUBDELIMS + '/~:@'
+
+    def __init__(self, viewname: str = 'wagtailimages_serve') -> None:
+        self.viewname = viewname
+        self._templates: Dict[Tuple[str, Any], Optional[str]] = {}
+        self._hmac: Optional[Tuple[bytes, Any]] = None
+
+    def template(self) -> Optional[str]:
+        key = (get_script_prefix(), get_urlconf())
+        if key not in self._templates:
+            try:
+                url = reverse(self.viewname, args=(self.SIGNATURE, self.IMAGE_ID, self.FILTER_SPEC))
+            except NoReverseMatch:
+                url = None
+            if url is not None and all(url.count(p) == 1 for p in (self.SIGNATURE, self.IMAGE_ID, self.FILTER_SPEC)):
+                self._templates[key] = url.replace('{', '{{').replace('}', '}}').replace(
+                    self.SIGNATURE, '{0}').replace(self.IMAGE_ID, '{1}').replace(self.FILTER_SPEC, '{2}')
             else:
-                fp = self.get_focal_point()
-                rendition = 'fill-%dx%d-c100' % (fp.width, fp.height)
+                self._templates[key] = None
+        return self._templates[key]
 
-        return generate_image_url(self, rendition)
+    def signature(self, image_id: Any, filter_spec: str) -> str:
+        key = settings.SECRET_KEY.encode()
+        if self._hmac is None or self._hmac[0] != key:
+            self._hmac = (key, hmac.new(key, digestmod=hashlib.sha1))
+        signature = self._hmac[1].copy()
+        signature.update('{}/{}/'.format(image_id, filter_spec).encode())
+        return base64.urlsafe_b64encode(signature.digest()).decode()
 
-    def resolve_url_link(self: wagtailImage, _info: ResolveInfo, rendition: str = None):
-        if not rendition:
-            if not self.has_focal_point():
-                rendition = "original"
-            else:
-                fp = self.get_focal_point()
-                rendition = 'fill-%dx%d-c100' % (fp.width, fp.height)
-        return self.get_rendition(rendition).url
+    def urls(self, images: Iterable[Tuple[Any, str]]) -> List[str]:
+        """The urls of ``(image id, filter spec)`` pairs."""
+        template = self.template()
+        if template is None:
+            return [reverse(self.viewname, args=(self.signature(image_id, spec), image_id, spec))
+                    for image_id, spec in images]
+        return [template.format(quote(self.signature(image_id, spec), safe=self.safe), image_id,
+                                quote(spec, safe=self.safe))
+                for image_id, spec in images]
+
+    def url(self, image_id: Any, filter_spec: str) -> str:
+        return self.urls([(image_id, filter_spec)])[0]
+
+
+image_url_builder = ImageUrlBuilder()
 
 
 def generate_image_url(image: wagtailImage, filter_spec: str) -> str:
-    signature = generate_signature(image.pk, filter_spec)
-    url = reverse('wagtailimages_serve', args=(signature, image.pk, filter_spec))
-    return url
+    return image_url_builder.url(image.pk, filter_spec)
+
+
+def _selected_renditions(info: ResolveInfo) -> List[Optional[str]]:
+    """The ``rendition`` arguments of the ``url`` fields selected on a list of images."""
+    field_def = getattr(get_named_type(info.return_type), 'fields')['url']
+    renditions: List[Optional[str]] = []
+    selection_sets = [f.selection_set for f in info.field_asts if f.selection_set]
+    while selection_sets:
+        for selection in selection_sets.pop().selections:
+            if isinstance(selection, FragmentSpread):
+                selection = info.fragments[selection.name.value]
+            if not isinstance(selection, Field):
+                selection_sets.append(selection.selection_set)
+            elif selection.name.value == 'url':
+                args = get_argument_values(field_def.args, selection.arguments, info.variable_values)
+                renditions.append(args.get('rendition'))
+    return renditions
+
+
+def prime_image_urls(info: ResolveInfo, images: List[wagtailImage]) -> None:
+    """Build the urls selected on a list of images in one batch."""
+    renditions = _selected_renditions(info)
+    if not renditions:
+        return
+    keys = [(image.pk, filter_spec(image, rendition)) for image in images for rendition in renditions]
+    urls = request_cache(info.context).setdefault('image_urls', {})
+    urls.update(zip(keys, image_url_builder.urls(keys)))
 
 
 def ImageQueryMixin():
     class Mixin:
-        images = graphene.List(Image)
+        images = graphene.List(Image, **list_arguments(), **collection_filters())
         image = graphene.Field(Image,
                                id=graphene.Int(required=True))
 
-        def resolve_images(self, info: ResolveInfo):
-            return with_collection_permissions(
+        def resolve_images(self, info: ResolveInfo, **kwargs):
+            images = list(paginate(with_collection_permissions(
                 info.context,
                 gql_optimizer.query(
-                    wagtailImage.objects.all(),
+                    filter_collection_items(wagtailImage.objects.all(), **kwargs),
                     info
                 )
-            )
+            ), 'images', **kwargs))
+            prime_image_urls(info, images)
+            return images
 
         def resolve_image(self, info: ResolveInfo, id: int):
             image = with_collection_permissions(
@@ -5,6 +5,7 @@ from graphql.execution.base import ResolveInfo
 # graphene
 import graphene
 # app
+from ..filters import list_arguments, paginate
 from ..registry import registry
 
 
@@ -16,12 +17,13 @@ def SnippetsQueryMixin():
                     types = registry.snippets.types
 
             snippets = graphene.List(Snippet,
-                                     typename=graphene.String(required=True))
+                                     typename=graphene.String(required=True),
+                                     **list_arguments())
 
-            def resolve_snippets(self, _info: ResolveInfo, typename: str) -> models.Model:
+            def resolve_snippets(self, _info: ResolveInfo, typename: str, **kwargs) -> models.Model:
                 node = registry.snippets_by_name[typename]
                 cls = node._meta.model
-                return cls.objects.all()
+                return paginate(cls.objects.all(), 'snippets', **kwargs)
         else:  # pragma: no cover
             pass
     return Mixin
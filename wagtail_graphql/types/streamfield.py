@@ -1,12 +1,14 @@
 # python
-from typing import Tuple, Callable
+from functools import partial
+from typing import Any, Callable, Optional, Set, Tuple, cast
 import datetime
+# django
+from django.utils.functional import Promise as LazyPromise
 # graphql
-from graphql import GraphQLScalarType
 from graphql.execution.base import ResolveInfo
+from graphql.language.ast import Field, FragmentSpread, SelectionSet
 # graphene
 import graphene
-from graphene.utils.str_converters import to_snake_case
 from graphene.types.generic import GenericScalar
 from graphene.types import Scalar
 # graphene_django
@@ -21,6 +23,7 @@ from wagtail.core.blocks import Block, ListBlock, StructBlock
 from wagtail.core.fields import StreamField
 # app
 from ..registry import registry
+from ..loaders import load, load_many
 from .. import settings
 # app types
 from .core import Page, wagtailPage
@@ -47,17 +50,50 @@ def _scalar_block(graphene_type):
     return tp
 
 
-def _resolve_scalar(key, type_):
-    type_str = str(type_)
-    if type_str == 'DateBlock':
-        def resolve(self, _info: ResolveInfo):
-            return type_(value=dtparse(self), field=key)
-    elif type_str == 'DateTimeBlock':
-        def resolve(self, _info: ResolveInfo):
-            return type_(value=dtparse(self), field=key)
-    elif type_str == 'TimeBlock':
+# python 3.7+, the dateutil parser is slower
+_FROMISOFORMAT = hasattr(datetime.date, 'fromisoformat')
+
+
+def _parse_date(value):
+    if _FROMISOFORMAT:
+        try:
+            return datetime.date.fromisoformat(value)
+        except (TypeError, ValueError):
+            pass
+    return dtparse(value)
+
+
+def _parse_datetime(value):
+    if _FROMISOFORMAT:
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            pass
+    return dtparse(value)
+
+
+def _parse_time(value):
+    if _FROMISOFORMAT:
+        return datetime.time.fromisoformat(value)
+    return dtparse(value).time()
+
+
+def _parser(graphene_type) -> Optional[Callable[[Any], Any]]:
+    """The function parsing the stored values of a scalar type, None if they are used as they are."""
+    if issubclass(graphene_type, graphene.types.DateTime):
+        return _parse_datetime
+    if issubclass(graphene_type, graphene.types.Date):
+        return _parse_date
+    if issubclass(graphene_type, graphene.types.Time):
+        return _parse_time
+    return None
+
+
+def _resolve_scalar(key, type_, graphene_type):
+    parse = _parser(graphene_type)
+    if parse is not None:
         def resolve(self, _info: ResolveInfo):
-            return type_(value=datetime.time.fromisoformat(self), field=key)
+            return type_(value=parse(self), field=key)
     else:
         def resolve(self, _info: ResolveInfo):
             return type_(value=self, field=key)
@@ -78,7 +114,7 @@ def _page_block():
 
 def _resolve_page_block(key, type_):
     def resolve(self, info: ResolveInfo):
-        return type_(value=_resolve_page(self, info), field=key)
+        return type_(value=_load_page(self, info), field=key)
     return resolve
 
 
@@ -96,7 +132,7 @@ def _image_block():
 
 def _resolve_image_block(key, type_):
     def resolve(self, info: ResolveInfo):
-        return type_(value=_resolve_image(self, info), field=key)
+        return type_(value=_load_image(self, info), field=key)
     return resolve
 
 
@@ -112,10 +148,9 @@ def _snippet_block(typ):
     return tp
 
 
-def _resolve_snippet_block(key, type_, snippet_type):
+def _resolve_snippet_block(key, type_, load_snippet):
     def resolve(self, info: ResolveInfo):
-        info.return_type = snippet_type
-        return type_(value=_resolve_snippet(self, info), field=key)
+        return type_(value=load_snippet(self, info), field=key)
     return resolve
 
 
@@ -132,16 +167,13 @@ def _list_block(typ):
 
 
 def _resolve_list_block_scalar(key, type_, of_type):
-    type_str = str(of_type)
-    if type_str == 'Date' or type_str == 'DateTime':
+    parse = _parser(of_type)
+    if parse is not None:
         def resolve(self, _info: ResolveInfo):
-            return type_(value=list(dtparse(s) for s in self), field=key)
-    elif type_str == 'Time':
-        def resolve(self, _info: ResolveInfo):
-            return type_(value=list(datetime.time.fromisoformat(s) for s in self), field=key)
+            return type_(value=[parse(s) for s in self], field=key)
     else:
         def resolve(self, _info: ResolveInfo):
-            return type_(value=list(s for s in self), field=key)
+            return type_(value=list(self), field=key)
     return resolve
 
 
@@ -150,14 +182,13 @@ def _resolve_list_block(key, type_, of_type):
         resolve = _resolve_list_block_scalar(key, type_, of_type)
     elif of_type == Image:
         def resolve(self, info: ResolveInfo):
-            return type_(value=list(_resolve_image(s, info) for s in self), field=key)
+            return type_(value=load_many(info, wagtailImage, self), field=key)
     elif of_type == Page:
         def resolve(self, info: ResolveInfo):
-            return type_(value=list(_resolve_page(s, info) for s in self), field=key)
+            return type_(value=load_many(info, wagtailPage, self), field=key)
     elif of_type in registry.snippets.values():
         def resolve(self, info: ResolveInfo):
-            info.return_type = of_type
-            return type_(value=list(_resolve_snippet(s, info) for s in self), field=key)
+            return type_(value=load_many(info, of_type._meta.model, self), field=key)
     else:
         def resolve(self, info: ResolveInfo):
             info.return_type = of_type
@@ -165,49 +196,86 @@ def _resolve_list_block(key, type_, of_type):
     return resolve
 
 
+def _root_block(k: str, t: Any) -> Any:
+    if not isinstance(t, tuple) and issubclass(t, Scalar):
+        typ = _scalar_block(t)
+        return typ, _resolve_scalar(k, typ, t)
+    elif isinstance(t, tuple) and isinstance(t[0], List):
+        typ = _list_block(t[0].of_type)
+        return typ, _resolve_list_block(k, typ, t[0].of_type)
+    elif isinstance(t, tuple) and issubclass(t[0], Page):
+        typ = _page_block()
+        return typ, _resolve_page_block(k, typ)
+    elif isinstance(t, tuple) and issubclass(t[0], Image):
+        typ = _image_block()
+        return typ, _resolve_image_block(k, typ)
+    elif isinstance(t, tuple) and t[0] in registry.snippets.values():
+        typ = _snippet_block(t[0])
+        return typ, _resolve_snippet_block(k, typ, t[1])
+    return t
+
+
 def _create_root_blocks(block_type_handlers: dict):
     for k, t in block_type_handlers.items():
-        if not isinstance(t, tuple) and issubclass(t, Scalar):
-            typ = _scalar_block(t)
-            block_type_handlers[k] = typ, _resolve_scalar(k, typ)
-        elif isinstance(t, tuple) and isinstance(t[0], List):
-            typ = _list_block(t[0].of_type)
-            block_type_handlers[k] = typ, _resolve_list_block(k, typ, t[0].of_type)
-        elif isinstance(t, tuple) and issubclass(t[0], Page):
-            typ = _page_block()
-            block_type_handlers[k] = typ, _resolve_page_block(k, typ)
-        elif isinstance(t, tuple) and issubclass(t[0], Image):
-            typ = _image_block()
-            block_type_handlers[k] = typ, _resolve_image_block(k, typ)
-        elif isinstance(t, tuple) and t[0] in registry.snippets.values():
-            typ = _snippet_block(t[0])
-            block_type_handlers[k] = typ, _resolve_snippet_block(k, typ, t[0])
-
-
-def convert_block(block, block_type_handlers: dict, info: ResolveInfo, is_lazy=True):
-    if is_lazy:
-        block_type = block.get('type')
-        value = block.get('value')
-    else:
-        block_type, value = block[:2]
-    if block_type in block_type_handlers:
-        handler = block_type_handlers[block_type]
-        if isinstance(handler, tuple):
-            tp, resolver = handler
-            return resolver(value, info)
-        else:
-            if isinstance(value, dict):
-                return handler(**value)
-            else:
-                raise NotImplementedError()  # pragma: no cover
-    else:
+        # handlers are shared by identical blocks, see block_handler, and kept alive by the memo
+        key = (k, id(t))
+        if key not in registry.root_blocks:
+            registry.root_blocks[key] = t, _root_block(k, t)
+        block_type_handlers[k] = registry.root_blocks[key][1]
+
+
+def _unknown_block(_value, _info: ResolveInfo):
+    raise NotImplementedError()  # pragma: no cover
+
+
+def _struct_block_converter(type_, name):
+    def convert(value, _info: ResolveInfo):
+        if isinstance(value, dict):
+            return type_(field=name, **value)
         raise NotImplementedError()  # pragma: no cover
+    return convert
+
+
+def compile_block_converters(block_type_handlers: dict) -> dict:
+    """Map each block name to a ``convert(value, info)`` function, chosen once per StreamField."""
+    return dict(
+        (name, handler[1] if isinstance(handler, tuple) else _struct_block_converter(handler, name))
+        for name, handler in block_type_handlers.items()
+    )
 
 
 def _resolve_type(self, _info: ResolveInfo):
     return self.__class__
 
 
+def _selected_block_types(info: ResolveInfo) -> Optional[Set[str]]:
+    """Names of the union members selected through fragments, None if every member is needed."""
+    union_type: Any = info.return_type
+    while hasattr(union_type, 'of_type'):
+        union_type = union_type.of_type
+
+    names = set()
+    for field_ast in info.field_asts:
+        for selection in cast(SelectionSet, field_ast.selection_set).selections:
+            if isinstance(selection, Field):    # e.g. __typename, every block is in the result
+                return None
+            if isinstance(selection, FragmentSpread):
+                selection = info.fragments[selection.name.value]
+            if selection.type_condition is None or selection.type_condition.name.value == union_type.name:
+                return None
+            names.add(selection.type_condition.name.value)
+    return names
+
+
+def _block_type_names(block_type_handlers: dict) -> dict:
+    names = {}
+    for k, t in block_type_handlers.items():
+        meta = getattr(t[0] if isinstance(t, tuple) else t, '_meta', None)
+        if meta is not None:
+            names[k] = meta.name
+    return names
+
+
 def stream_field_handler(stream_field_name: str, field_name: str, block_type_handlers: dict) -> StreamFieldHandlerType:
     # add Generic Scalars (default)
     if settings.LOAD_GENERIC_SCALARS:
@@ -234,11 +302,81 @@ def stream_field_handler(stream_field_name: str, field_name: str, block_type_han
         }
     )
 
-    def resolve_field(self, info: ResolveInfo):
-        field = getattr(self, field_name)
-        return [convert_block(block, block_type_handlers, info, field.is_lazy) for block in field.stream_data]
+    block_type_names = _block_type_names(block_type_handlers)
+    converters = compile_block_converters(block_type_handlers)
 
-    return graphene.List(stream_field_type), resolve_field
+    def resolve_field(self, info: ResolveInfo, first: int = None, offset: int = 0):
+        if (first is not None and first < 0) or offset < 0:
+            raise ValueError("'first' and 'offset' must be non-negative")
+        field = getattr(self, field_name)
+        # paginate on the positions in the stream, before converting blocks or resolving choosers
+        blocks = field.stream_data[offset:] if first is None else field.stream_data[offset:offset + first]
+        selected = _selected_block_types(info)
+        if selected is not None:
+            # skip the blocks no fragment asks for, before converting them
+            index = 'type' if field.is_lazy else 0
+            blocks = [block for block in blocks if block_type_names.get(block[index], '') in selected]
+        if field.is_lazy:
+            return [converters.get(block.get('type'), _unknown_block)(block.get('value'), info) for block in blocks]
+        return [converters.get(block[0], _unknown_block)(block[1], info) for block in blocks]
+
+    pagination = ("Positions in the stream, blocks that no fragment selects are left out of the page, "
+                  "so a page can have fewer than 'first' blocks")
+    return graphene.List(stream_field_type, first=graphene.Int(description=pagination),
+                         offset=graphene.Int(description=pagination)), resolve_field
+
+
+def block_signature(block: Block) -> tuple:
+    """The parts of a block definition its GraphQL type depends on, nested for compound blocks.
+
+    The signature is stored on the block, blocks aren't hashable.
+    """
+    if isinstance(block, type):    # the graphene type of a custom block
+        return ('type', '%s.%s' % (block.__module__, block.__qualname__))
+    signature = block.__dict__.get('_graphql_signature')
+    if signature is None:
+        signature = block._graphql_signature = _block_signature(block)
+    return signature
+
+
+def _block_signature(block: Block) -> tuple:
+    cls = block.__class__
+    path = '%s.%s' % (cls.__module__, cls.__qualname__)
+    if _is_custom_type(block):
+        # the converter calls this block's ``__graphql_resolve__``
+        try:
+            _path, args, kwargs = block.deconstruct()
+        except ValueError:  # classes defined in a function can't be imported from their path
+            args, kwargs = block._constructor_args
+        return (path, block_signature(block.__graphql_type__()), _frozen(args), _frozen(kwargs))
+    if _is_compound_block(block) or isinstance(block, wagtail.core.blocks.StreamBlock):
+        return (path, tuple((name, block_signature(child)) for name, child in block.child_blocks.items()))
+    if _is_list_block(block):
+        return (path, block_signature(block.child_block))
+    if isinstance(block, wagtail.snippets.blocks.SnippetChooserBlock):
+        return (path, block.target_model._meta.label)
+    return (path,)
+
+
+def _frozen(value: Any) -> Any:
+    """A hashable form of the construction arguments of a block, the same in every process."""
+    if isinstance(value, Block):
+        return block_signature(value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _frozen(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_frozen(v) for v in value)
+    if isinstance(value, LazyPromise):   # lazy translations
+        return str(value)
+    if isinstance(value, partial):
+        return ('partial', _frozen(value.func), _frozen(value.args), _frozen(value.keywords))
+    if hasattr(value, 'deconstruct') and not isinstance(value, type):    # e.g. validators
+        path, args, kwargs = value.deconstruct()
+        return (path, _frozen(args), _frozen(kwargs))
+    if callable(value) or type(value).__repr__ is object.__repr__:
+        owner = value if hasattr(value, '__qualname__') else type(value)
+        return '%s.%s' % (owner.__module__, owner.__qualname__)
+    return repr(value)
 
 
 def _is_compound_block(block):
@@ -253,6 +391,15 @@ def _is_custom_type(block):
     return hasattr(block, "__graphql_type__")
 
 
+def _field_resolver(name, convert):
+    """Resolve a StructBlock field by converting the value of the child block ``name``."""
+    def resolve(self, info: ResolveInfo):
+        if self is None:
+            return None
+        return convert(getattr(self, name), info)
+    return resolve
+
+
 def _add_handler_resolves(dict_params):
     to_add = {}
     for k, v in dict_params.items():
@@ -260,25 +407,36 @@ def _add_handler_resolves(dict_params):
             raise ValueError("StructBlocks cannot have fields named 'field'")
         if isinstance(v, tuple):
             val = v[0]
-            to_add['resolve_' + k] = v[1]
-        elif issubclass(v, (graphene.types.DateTime, graphene.types.Date)):
-            val = v
-            to_add['resolve_' + k] = _resolve_datetime
-        elif issubclass(v, graphene.types.Time):
-            val = v
-            to_add['resolve_' + k] = _resolve_time
+            to_add['resolve_' + k] = _field_resolver(k, v[1])
         elif not issubclass(v, Scalar):
             val = v
-            to_add['resolve_' + k] = _resolve
+            to_add['resolve_' + k] = _field_resolver(k, _struct_converter(v, k))
         else:
             val = v
+            parse = _parser(v)
+            if parse is not None:
+                to_add['resolve_' + k] = _field_resolver(k, _optional(parse))
         dict_params[k] = graphene.Field(val)
     dict_params.update(to_add)
 
 
 def block_handler(block: Block, app, prefix=''):
+    """The graphene type of a block, or its ``(type, resolver)`` pair.
+
+    Memoized on the structure of the block and the prefix, so identical block trees in different
+    StreamFields share their types, list wrappers and resolvers.
+    """
+    key = (block_signature(block), prefix)
+    handler = registry.block_types.get(key)
+    if handler is None:
+        handler = registry.block_types[key] = _block_handler(block, app, prefix)
+    return handler
+
+
+def _block_handler(block: Block, app, prefix=''):
     cls = block.__class__
-    handler = registry.blocks.get(cls)
+    # compound blocks of a class differ by their child blocks
+    handler = None if _is_compound_block(block) else registry.blocks.get(cls)
 
     if handler is None:
         if _is_custom_type(block):
@@ -287,152 +445,118 @@ def block_handler(block: Block, app, prefix=''):
             if isinstance(this_handler, tuple):
                 raise NotImplementedError()
             if hasattr(block, '__graphql_resolve__'):
-                resolver = _resolve_custom(block, this_handler)
+                resolver = _custom_converter(block, this_handler)
             elif issubclass(target_block_type, Scalar):
-                resolver = _resolve_generic_scalar
+                resolver = _serialize_converter(this_handler)
             else:
                 raise TypeError("Non Scalar custom types need an explicit __graphql_resolve__ method.")
             handler = (lambda x: this_handler, resolver)
         elif _is_compound_block(block):
-            node = prefix + cls.__name__
+            node = _unique_type_name(prefix + cls.__name__)
             dict_params = dict(
                 (n, block_handler(block_type, app, prefix))
                 for n, block_type in block.child_blocks.items()
             )
             _add_handler_resolves(dict_params)
-            dict_params.update({  # add the field name
-                'field': graphene.Field(graphene.String),
-                'resolve_field': lambda *x: block.name,
-            })
-            tp = type(node, (graphene.ObjectType,), dict_params)
-            handler = tp
-            registry.blocks[cls] = handler
+            # the name of the block, set by the converters as the type is shared by blocks of any name
+            dict_params['field'] = graphene.Field(graphene.String)
+            handler = type(node, (graphene.ObjectType,), dict_params)
         elif _is_list_block(block):
             this_handler = block_handler(block.child_block, app, prefix)
             if isinstance(this_handler, tuple):
-                handler = List(this_handler[0]), _resolve_list(*this_handler)
+                handler = List(this_handler[0]), _list_converter(this_handler[1])
             else:
-                handler = List(this_handler), _resolve_simple_list
+                handler = List(this_handler), _simple_list_converter(this_handler)
         else:
             handler = GenericScalar
 
     if cls == wagtail.snippets.blocks.SnippetChooserBlock:
-        handler = (handler[0](block), handler[1])   # type: ignore
+        handler = (handler[0](block), handler[1](block))   # type: ignore
 
     return handler
 
 
+def _unique_type_name(name: str) -> str:
+    """``name``, numbered when the type of another block already has it."""
+    taken = set(getattr(handler, '__name__', None) for handler in registry.block_types.values())
+    unique, n = name, 1
+    while unique in taken:
+        n += 1
+        unique = '%s_%d' % (name, n)
+    return unique
+
+
 def _snippet_handler(block):
     tp = registry.snippets[block.target_model]
     return tp
 
 
-def _resolve_snippet(self, info: ResolveInfo):
-    if self is None:
-        return None
-    field = to_snake_case(info.field_name)
-    id_ = self if isinstance(self, int) else getattr(self, field)
-    if hasattr(info.return_type, 'graphene_type'):
-        cls = info.return_type.graphene_type._meta.model
-    else:
-        cls = info.return_type._meta.model
-    obj = cls.objects.filter(id=id_).first()
-    return obj
+def _snippet_converter(block):
+    model = block.target_model
 
+    def convert(value, info: ResolveInfo):
+        return load(info, model, value)
+    return convert
 
-def _resolve_image(self, info: ResolveInfo):
-    if self is None:
-        return None
-    field = to_snake_case(info.field_name)
-    id_ = self if isinstance(self, int) else getattr(self, field)
-    return wagtailImage.objects.filter(id=id_).first()
 
+def _load_image(value, info: ResolveInfo):
+    return load(info, wagtailImage, value)
 
-def _resolve_page(self, info: ResolveInfo):
-    if self is None:
-        return None
-    field = to_snake_case(info.field_name)
-    id_ = self if isinstance(self, int) else getattr(self, field)
-    return wagtailPage.objects.filter(id=id_).specific().first()
 
+def _load_page(value, info: ResolveInfo):
+    return load(info, wagtailPage, value)
 
-def _resolve(self, info: ResolveInfo):
-    if self is None:
-        return None
-    field = to_snake_case(info.field_name)
-    data = getattr(self, field)
-    cls = info.return_type
-    return cls.graphene_type(**data)
 
+def _struct_converter(type_, name):
+    def convert(value, _info: ResolveInfo):
+        return None if value is None else type_(field=name, **value)
+    return convert
 
-def _resolve_datetime(self, info: ResolveInfo):
-    if self is None:
-        return None
-    field = to_snake_case(info.field_name)
-    data = getattr(self, field)
-    return dtparse(data) if data else None
 
+def _optional(parse):
+    def convert(value, _info: ResolveInfo):
+        return parse(value) if value else None
+    return convert
 
-def _resolve_time(self, info: ResolveInfo):
-    if self is None:
-        return None
-    field = to_snake_case(info.field_name)
-    data = getattr(self, field)
-    return datetime.time.fromisoformat(data) if data else None
 
+def _custom_converter(block, hdl):
+    serialize = getattr(hdl, 'serialize', None)
 
-def _resolve_custom(block, hdl):
-    def _inner(self, info: ResolveInfo):
-        if self is None:
-            return None
-        cls = info.return_type
-        if isinstance(self, dict):
-            data = self
-        else:
-            data = getattr(self, info.field_name)
-        value = block.__graphql_resolve__(data, info)
-
-        if hasattr(cls, "serialize"):
-            return cls.serialize(value)
+    def convert(value, info: ResolveInfo):
+        value = block.__graphql_resolve__(value, info)
+        if serialize is not None:
+            return serialize(value)
         return hdl(**value)
-    return _inner
+    return convert
 
 
-def _resolve_generic_scalar(self, info: ResolveInfo):
-    if self is None:
-        return None
-    data = getattr(self, info.field_name)
-    cls = info.return_type
-    return cls.serialize(data)
+def _serialize_converter(type_):
+    def convert(value, _info: ResolveInfo):
+        return None if value is None else type_.serialize(value)
+    return convert
 
 
-def _resolve_simple_list(self, info: ResolveInfo):
-    if self is None:
-        return None
-    field = to_snake_case(info.field_name)
-    data = getattr(self, field)
-    cls = info.return_type.of_type
-    if isinstance(cls, (Scalar, GraphQLScalarType)):
-        return list(d for d in data)
-    return list(cls(**d) for d in data)
+def _simple_list_converter(of_type):
+    if issubclass(of_type, Scalar):
+        def convert(value, _info: ResolveInfo):
+            return None if value is None else list(value)
+    else:
+        def convert(value, _info: ResolveInfo):
+            return None if value is None else [of_type(**d) for d in value]
+    return convert
 
 
-def _resolve_list(tp, inner_resolver):
-    def resolve(self, info: ResolveInfo):
-        if self is None:
-            return None
-        field = to_snake_case(info.field_name)
-        ids = getattr(self, field)
-        info.return_type = tp
-        return list(inner_resolver(i, info) for i in ids)
-    return resolve
+def _list_converter(inner):
+    def convert(value, info: ResolveInfo):
+        return None if value is None else [inner(v, info) for v in value]
+    return convert
 
 
 registry.blocks.update({
     # choosers
-    wagtail.images.blocks.ImageChooserBlock: (Image, _resolve_image),
-    wagtail.core.blocks.PageChooserBlock: (Page, _resolve_page),
-    wagtail.snippets.blocks.SnippetChooserBlock: (_snippet_handler, _resolve_snippet),
+    wagtail.images.blocks.ImageChooserBlock: (Image, _load_image),
+    wagtail.core.blocks.PageChooserBlock: (Page, _load_page),
+    wagtail.snippets.blocks.SnippetChooserBlock: (_snippet_handler, _snippet_converter),
     # standard fields
     wagtail.core.blocks.CharBlock: graphene.types.String,
     wagtail.core.blocks.URLBlock: graphene.types.String,
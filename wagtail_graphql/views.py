@@ -0,0 +1,144 @@
+# python
+import json
+from typing import Any, Optional
+# graphql
+from graphql.execution import ExecutionResult
+from graphql.execution.middleware import MiddlewareManager
+# graphene_django
+from graphene_django.views import GraphQLView as BaseGraphQLView
+# app
+from .backend import document_cache
+from .cost import QueryCostError, query_cost
+from .loaders import request_cache
+from .persisted import PersistedQueryBackend, PersistedQueryError, persisted_queries
+from .response_cache import ResponseTagsMiddleware, response_cache
+from .timing import RequestTimings, ResolverTimingMiddleware, resolver_timing
+
+
+class GraphQLView(BaseGraphQLView):
+    """GraphQL view caching parsed documents and accepting automatic persisted queries.
+
+    Unless another ``backend`` is given, the documents of recent queries are kept in the
+    ``document_cache`` LRU.  Requests carrying ``extensions.persistedQuery.sha256Hash`` run the
+    precompiled document of that hash, skipping parsing and validation.  With ``RESPONSE_CACHE``
+    configured, the data of query responses is cached too.  With ``QUERY_COST`` configured,
+    queries over budget are rejected before running and the cost is reported in ``extensions``.
+    Requests can be timed per resolver, see ``resolver_timing``.
+    """
+    persisted_queries = persisted_queries
+    response_cache = response_cache
+    query_cost = query_cost
+    resolver_timing = resolver_timing
+
+    def __init__(self, backend=None, **kwargs):
+        super().__init__(backend=backend or document_cache, **kwargs)
+
+    @staticmethod
+    def get_persisted_query_hash(request: Any, data: Any) -> Optional[str]:
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                return None
+        if not isinstance(extensions, dict) or not isinstance(extensions.get('persistedQuery'), dict):
+            return None
+        return extensions['persistedQuery'].get('sha256Hash')
+
+    def get_backend(self, request):
+        hash_ = request_cache(request).get('persisted_query')
+        if hash_ is None:
+            return super().get_backend(request)
+        return PersistedQueryBackend(self.persisted_queries, hash_)
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        if 'timings' not in request_cache(request):
+            report = self.resolver_timing.requested(request)
+            if report or self.resolver_timing.sampled():
+                return self.execute_timed_request(request, data, query, variables, operation_name, show_graphiql,
+                                                  report=report)
+        hash_ = request_cache(request)['persisted_query'] = self.get_persisted_query_hash(request, data)
+        if hash_ is not None:
+            try:
+                query = self.persisted_queries.query(hash_, query)
+            except PersistedQueryError as e:
+                return ExecutionResult(errors=[e], invalid=e.invalid)
+        if query and self.query_cost.enabled:
+            try:
+                self.check_query_cost(request, query, variables, operation_name)
+            except QueryCostError as e:
+                return ExecutionResult(errors=[e], invalid=True)
+        if query and self.response_cache.enabled:
+            return self.execute_cached_request(request, data, query, variables, operation_name, show_graphiql)
+        return super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+
+    def execute_timed_request(self, request, data, query, variables, operation_name, show_graphiql=False,
+                              report=False):
+        """Execute a request recording the time and database queries of each resolver."""
+        timings = request_cache(request)['timings'] = RequestTimings()
+        try:
+            with timings.measure():
+                result = self.execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+        finally:
+            del request_cache(request)['timings']
+        self.resolver_timing.report(timings)
+        if report:
+            request_cache(request).setdefault('extensions', {})['timing'] = timings.as_dict()
+        return result
+
+    def check_query_cost(self, request, query, variables, operation_name):
+        try:
+            document = self.get_backend(request).document_from_string(self.schema, query)
+        except Exception:
+            # let the view report the error
+            return
+        cost, depth = self.query_cost.analyze(self.schema, document.document_ast, operation_name, variables)
+        request_cache(request).setdefault('extensions', {}).update(self.query_cost.extensions(cost, depth))
+        self.query_cost.check(cost, depth)
+
+    def json_encode(self, request, d, pretty=False):
+        extensions = request_cache(request).pop('extensions', None)
+        if extensions and isinstance(d, dict):
+            d = dict(d, extensions=extensions)
+        return super().json_encode(request, d, pretty)
+
+    def execute_cached_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """Execute a request, reusing the cached response data of identical queries."""
+        execute = super().execute_graphql_request
+        try:
+            document = self.get_backend(request).document_from_string(self.schema, query)
+        except Exception:
+            # let the view report the error
+            return execute(request, data, query, variables, operation_name, show_graphiql)
+        if not self.response_cache.cacheable(document, operation_name):
+            return execute(request, data, query, variables, operation_name, show_graphiql)
+
+        key = self.response_cache.key(request, query, variables, operation_name)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return ExecutionResult(data=cached)
+        generation = self.response_cache.generation()
+        tags = request_cache(request)['response_tags'] = set()
+        try:
+            result = execute(request, data, query, variables, operation_name, show_graphiql)
+        finally:
+            del request_cache(request)['response_tags']
+        if result is not None and not result.errors and not result.invalid:
+            self.response_cache.set(key, result.data, tags, generation)
+        return result
+
+    def get_middleware(self, request):
+        middleware = super().get_middleware(request)
+        extra: list = []
+        if 'response_tags' in request_cache(request):
+            extra.append(ResponseTagsMiddleware())
+        if 'timings' in request_cache(request):
+            extra.append(ResolverTimingMiddleware())
+        if not extra:
+            return middleware
+        if isinstance(middleware, MiddlewareManager):
+            return MiddlewareManager(*middleware.middlewares, *extra, wrap_in_promise=middleware.wrap_in_promise)
+        if middleware:
+            return list(middleware) + extra
+        # resolvers don't need to return promises for these
+        return MiddlewareManager(*extra, wrap_in_promise=False)